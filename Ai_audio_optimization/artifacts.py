@@ -0,0 +1,71 @@
+import os
+import json
+from dataclasses import dataclass, field
+
+from utils import save_transcript_text, save_word_timestamps, save_transcript_metadata
+from word_index import WordIndex
+
+ARTIFACTS_ROOT = os.path.join("output", "runs")
+
+
+@dataclass
+class TranscriptResult:
+    """What the disfluency stage hands back to the orchestrator."""
+    transcript_uuid: str
+    text: str
+    words: list = field(default_factory=list, repr=False)
+    transcript_path: str | None = None
+    timestamps_path: str | None = None
+    word_index: WordIndex | None = field(default=None, repr=False)
+
+
+class RunArtifacts:
+    """
+    Private artifact directory for one run: output/runs/<run_id>/.
+
+    Every file a stage persists is recorded in the run's index.json under a
+    stable kind ("transcript", "timestamps", ...), so later stages and tools
+    look artifacts up by run id and kind instead of scanning output/.
+    Concurrent runs never share a directory.
+    """
+
+    def __init__(self, run_id, root=ARTIFACTS_ROOT):
+        self.run_id = run_id
+        self.path = os.path.join(root, run_id)
+        os.makedirs(self.path, exist_ok=True)
+        self.index_path = os.path.join(self.path, "index.json")
+
+        self.index = {"run_id": run_id, "artifacts": {}}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def get(self, kind):
+        """Path of the artifact recorded under `kind`, or None."""
+        name = self.index["artifacts"].get(kind)
+        return self.file(name) if name else None
+
+    def record(self, kind, path):
+        self.index["artifacts"][kind] = os.path.relpath(path, self.path)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+        return path
+
+    def save_transcript(self, result: TranscriptResult):
+        """Persists transcript text, word timestamps and metadata, and records them in the index."""
+        result.transcript_path = self.file(f"{result.transcript_uuid}.txt")
+        result.timestamps_path = self.file(f"{result.transcript_uuid}_words.idx")
+
+        save_transcript_text(result.text, result.transcript_path)
+        result.word_index = save_word_timestamps(result.words, result.timestamps_path)
+        save_transcript_metadata(result.transcript_uuid, self.path)
+
+        self.record("transcript", result.transcript_path)
+        self.record("timestamps", result.timestamps_path)
+        self.record("transcript_meta", self.file(f"{result.transcript_uuid}_meta.json"))
+        return result
@@ -1,27 +1,19 @@
-import os
 import uuid
-import json
-import requests
-import whisper # type: ignore
-import subprocess
-import tempfile
-from pathlib import Path
+import numpy as np
 from dotenv import load_dotenv
-from pydub import AudioSegment # type: ignore
 # from df.enhance import enhance, init_df, load_audio # type: ignore
-from tempfile import NamedTemporaryFile
+from audio_io import to_wav_bytes, to_mono
+from vad import detect_speech
+from loudness import write_normalized
+from denoise_client import get_denoise_client
 from utils import (
     generate_transcription_and_timestamps,
-    save_transcript_text,
-    save_word_timestamps,
-    remove_non_word_regions,
-    save_transcript_metadata
+    remove_non_word_regions
 )
+from artifacts import RunArtifacts, TranscriptResult
 
 load_dotenv()
 
-ZROK_URL = os.getenv("ZROK_DENOISE_URL")
-
 # def denoise_audio(input_path):
 #     """
 #     Perform noise reduction on an input audio file using DeepFilterNet.
@@ -43,124 +35,127 @@ ZROK_URL = os.getenv("ZROK_DENOISE_URL")
 #     enhanced = enhance(model, df_state, audio)
 #     return enhanced, df_state.sr()
 
-def denoise_audio(input_path):
+def denoise_audio(audio, sr, output_path=None):
     """
     Denoise audio by sending it to the hosted DeepFilterNet API via FastAPI + Zrok.
 
+    The buffer is split into overlapping chunks that are uploaded as FLAC
+    concurrently over a pooled session (see `DenoiseClient`) and crossfaded
+    back together as they return.
+
     Parameters:
     -----------
-    input_path : str
-        Path to the input audio file to be denoised.
+    audio : np.ndarray
+        float32 samples, (frames,) or (frames, channels).
+    sr : int
+        Sample rate of `audio`.
+    output_path : str, optional
+        If given, denoised audio is streamed to this file chunk by chunk
+        instead of being held in memory, and the path is returned.
 
     Returns:
     --------
-    output_path : str
-        Path to the denoised audio file saved locally.
+    denoised : np.ndarray or str
+        float32 denoised samples, or `output_path` when one was given.
     sample_rate : int
-        Sample rate of the denoised audio (default: 16000).
+        Sample rate of the denoised audio, as reported by the service.
     """
-    if not ZROK_URL:
-        raise EnvironmentError("ZROK_DENOISE_URL is not set in environment variables.")
-
-    print(f"📤 Uploading audio to DeepFilterNet API: {input_path}")
-    with open(input_path, "rb") as f:
-        files = {"file": (input_path, f, "audio/wav")}
-        response = requests.post(ZROK_URL, files=files)
+    print(f"📤 Uploading audio to DeepFilterNet API ({len(audio) / sr:.1f}s @ {sr} Hz)")
+    client = get_denoise_client()
+    if output_path:
+        path, out_sr = client.denoise_to_file(audio, sr, output_path)
+        print(f"✅ Denoised audio streamed to: {path}")
+        return path, out_sr
 
-    if response.status_code != 200:
-        raise RuntimeError(f"Failed to denoise audio: {response.status_code} - {response.text}")
+    denoised, out_sr = client.denoise(audio, sr)
 
-    with NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-        temp_file.write(response.content)
-        output_path = temp_file.name
+    print(f"✅ Denoised audio received: {len(denoised) / out_sr:.1f}s @ {out_sr} Hz")
+    return denoised, out_sr
 
-    print(f"✅ Denoised audio saved to: {output_path}")
-    return output_path, 16000
 
-
-def disfluency_removal(audio_seg: AudioSegment, sr: int):
+def remove_disfluencies(audio: np.ndarray, sr: int):
     """
-    Removes disfluencies (filler words) from an AudioSegment.
-    Saves transcript, timestamps, and UUID metadata.
+    Transcribes the speech in a float32 buffer and cuts filler words and non-speech out of it.
     Falls back to original audio if transcription has no word-level timestamps.
+
+    Returns:
+    --------
+    tuple: (cleaned_audio, full_text, words), word timestamps relative to `audio`.
     """
     filler_words = {"um", "uh", "ah", "erm", "mm", "hmm"}
     buffer_sec = 0.05
     fade_ms = 20
 
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
-        temp_path = temp_wav.name
-        audio_seg.export(temp_path, format="wav")
+    # Only detected speech is sent for transcription; timestamps are mapped back afterwards
+    speech_map = detect_speech(audio, sr)
+    print(f"🗣️ Speech detected: {speech_map.speech_duration:.1f}s of {speech_map.duration:.1f}s "
+          f"in {len(speech_map.regions)} regions")
 
-    try:
-        print("🎙️ Transcribing to identify disfluencies...")
-        full_text, words = generate_transcription_and_timestamps(temp_path)
+    print("🎙️ Transcribing to identify disfluencies...")
+    speech_only = speech_map.compact(to_mono(audio), sr)
+    full_text, words = generate_transcription_and_timestamps(to_wav_bytes(speech_only, sr))
+    words = speech_map.remap_words(words)
 
-        file_uuid = str(uuid.uuid4())
-        output_dir = "output"
-        transcript_path = os.path.join(output_dir, f"{file_uuid}.txt")
-        word_ts_path = os.path.join(output_dir, f"{file_uuid}_timestamps.json")
+    if not words:
+        print("⚠️ No words detected in transcript. Skipping disfluency removal.")
+        return audio, full_text, words
 
-        save_transcript_text(full_text, transcript_path)
-        save_word_timestamps(words, word_ts_path)
-        save_transcript_metadata(file_uuid, output_dir)
+    cleaned_audio = remove_non_word_regions(audio, sr, words, filler_words, buffer_sec, fade_ms, speech_map)
 
-        if not words:
-            print("⚠️ No words detected in transcript. Skipping disfluency removal.")
-            return audio_seg
+    if len(cleaned_audio) == 0:
+        print("⚠️ Disfluency removal resulted in empty audio. Using original instead.")
+        return audio, full_text, words
 
-        cleaned_audio = remove_non_word_regions(temp_path, words, filler_words, buffer_sec, fade_ms)
+    return cleaned_audio, full_text, words
 
-        if len(cleaned_audio) == 0:
-            print("⚠️ Disfluency removal resulted in empty audio. Using original instead.")
-            return audio_seg
 
-    finally:
-        os.remove(temp_path)
+def disfluency_removal(audio: np.ndarray, sr: int, artifacts: RunArtifacts | None = None):
+    """
+    Removes disfluencies (filler words) from a float32 audio buffer.
+    Saves transcript, timestamps, and UUID metadata into the run's artifact directory.
 
-    return cleaned_audio
+    Returns:
+    --------
+    cleaned_audio : np.ndarray
+        float32 samples with filler words removed.
+    transcript : TranscriptResult
+        Transcript text, word timestamps and ids, for the caller to use directly.
+    """
+    artifacts = artifacts or RunArtifacts(str(uuid.uuid4()))
+    cleaned_audio, full_text, words = remove_disfluencies(audio, sr)
+
+    transcript = artifacts.save_transcript(
+        TranscriptResult(transcript_uuid=str(uuid.uuid4()), text=full_text, words=words)
+    )
+    return cleaned_audio, transcript
 
-def normalize_audio(audio_seg, output_path, apply_normalization=True):
+def normalize_audio(audio, sr, output_path, apply_normalization=True, mode=None):
     """
-    Normalize and optionally compress an audio segment using ffmpeg filters.
+    Compress, loudness-normalize and true-peak limit an audio buffer in process.
 
-    This function exports the given AudioSegment to a temporary WAV file,
-    then applies audio compression and loudness normalization filters using ffmpeg,
-    and saves the processed audio to the specified output path.
+    Runs the native engine in `loudness.py` on numpy blocks and writes the
+    result in a single encode; no ffmpeg process or temp file is involved.
 
     Parameters:
     -----------
-    audio_seg : AudioSegment
-        The audio segment to be processed and normalized.
+    audio : np.ndarray
+        float32 samples, (frames,) or (frames, channels).
+    sr : int
+        Sample rate of `audio`.
     output_path : str
         The file path where the normalized audio will be saved.
     apply_normalization : bool, optional (default=True)
         Whether to apply loudness normalization along with compression.
         If False, only compression is applied.
+    mode : str, optional
+        "two_pass" (exact integrated loudness) or "streaming" (bounded memory).
+        Defaults to the AUDIO_NORMALIZE_MODE environment variable, then "two_pass".
 
     Effects:
     --------
     - Applies dynamic range compression with threshold -30dB, ratio 6, attack 10ms, release 1000ms.
-    - Applies loudness normalization to target integrated loudness of -16 LUFS,
-      true peak of -1.5 dB, and loudness range of 11 LU.
+    - Applies loudness normalization to a BS.1770 integrated loudness of -16 LUFS
+      and limits true peaks to -1.5 dBTP.
     - Saves the processed audio at `output_path`.
     """
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as raw_file:
-        audio_seg.export(raw_file.name, format="wav")
-
-    compress_filter = "acompressor=threshold=-30dB:ratio=6:attack=10:release=1000"
-    normalize_filter = "loudnorm=I=-16:TP=-1.5:LRA=11"
-
-    if apply_normalization:
-        subprocess.run([
-            "ffmpeg", "-y", "-i", raw_file.name,
-            "-af", f"{compress_filter},{normalize_filter}",
-            output_path
-        ], check=True)
-    else:
-        subprocess.run([
-            "ffmpeg", "-y", "-i", raw_file.name,
-            "-af", compress_filter,
-            output_path
-        ], check=True)
-
+    write_normalized(audio, sr, output_path, mode=mode, apply_normalization=apply_normalization)
@@ -0,0 +1,65 @@
+import io
+import numpy as np
+import soundfile as sf  # type: ignore
+from pydub import AudioSegment  # type: ignore
+
+
+def load_audio(path):
+    """
+    Decode an audio file once into a float32 buffer.
+
+    Args:
+        path (str): Path to a WAV/FLAC/OGG file (read natively) or any format ffmpeg
+            understands (decoded through pydub).
+
+    Returns:
+        tuple: (samples, sample_rate) where samples is float32 in [-1, 1],
+            shaped (frames,) for mono or (frames, channels) otherwise.
+    """
+    try:
+        samples, sr = sf.read(path, dtype="float32", always_2d=False)
+        return samples, sr
+    except RuntimeError:
+        return segment_to_array(AudioSegment.from_file(path))
+
+
+def save_audio(path, samples, sr, subtype="PCM_16"):
+    """Write a float32 buffer to disk in a single encode."""
+    sf.write(path, samples, sr, subtype=subtype)
+    return path
+
+
+def segment_to_array(audio_seg):
+    """Convert a pydub AudioSegment to (float32 samples, sample_rate)."""
+    scale = float(1 << (8 * audio_seg.sample_width - 1))
+    samples = np.asarray(audio_seg.get_array_of_samples(), dtype=np.float32) / scale
+    if audio_seg.channels > 1:
+        samples = samples.reshape(-1, audio_seg.channels)
+    return samples, audio_seg.frame_rate
+
+
+def array_to_segment(samples, sr):
+    """Convert a float32 buffer to a 16-bit pydub AudioSegment (in memory)."""
+    pcm = np.rint(np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    channels = 1 if pcm.ndim == 1 else pcm.shape[1]
+    return AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=sr, channels=channels)
+
+
+def to_wav_bytes(samples, sr, subtype="PCM_16"):
+    """Encode a float32 buffer as an in-memory WAV file."""
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sr, format="WAV", subtype=subtype)
+    return buffer.getvalue()
+
+
+def from_wav_bytes(data):
+    """Decode in-memory audio bytes (WAV/FLAC/OGG) into (float32 samples, sample_rate)."""
+    samples, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=False)
+    return samples, sr
+
+
+def to_mono(samples):
+    """Downmix (frames, channels) to (frames,); mono input is returned unchanged."""
+    if samples.ndim == 1:
+        return samples
+    return samples.mean(axis=1, dtype=np.float32)
@@ -0,0 +1,161 @@
+"""
+Batch mode: process a directory (or manifest) of episodes in a process pool.
+
+Each worker process imports the pipeline once and keeps its clients warm
+(denoise session, upload session, Cloudinary config, OpenAI clients) for
+every episode it handles. One line per episode is appended to a JSONL
+result manifest as soon as it finishes, so a crashed batch can be resumed:
+
+    python batch.py episodes/ --workers 3
+    python batch.py episodes.txt --manifest output/batch/manifest.jsonl --resume
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".aac")
+BATCH_DIR = os.path.join("output", "batch")
+DEFAULT_MANIFEST = os.path.join(BATCH_DIR, "manifest.jsonl")
+
+
+def collect_inputs(source):
+    """
+    Lists the episodes to process from a directory, a .txt file with one path
+    per line, or a .json file holding a list of paths.
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith(AUDIO_EXTENSIONS)
+        )
+
+    with open(source, "r", encoding="utf-8") as f:
+        if source.lower().endswith(".json"):
+            paths = json.load(f)
+        else:
+            paths = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    # Relative entries are relative to the manifest's own directory
+    base = os.path.dirname(os.path.abspath(source))
+    return [p if os.path.isabs(p) else os.path.join(base, p) for p in paths]
+
+
+def load_completed(manifest_path):
+    """Inputs already recorded as successful in an existing result manifest."""
+    done = set()
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written line from an interrupted batch
+            if entry.get("status") == "ok":
+                done.add(os.path.abspath(entry["input"]))
+    return done
+
+
+def _init_worker():
+    """Runs once per worker process: imports the pipeline and builds the shared clients."""
+    import main  # noqa: F401  (loads .env and configures Cloudinary)
+    from denoise_client import get_denoise_client
+    from delivery import get_uploader
+
+    get_denoise_client()
+    get_uploader()
+    print(f"🔥 Worker {os.getpid()} ready", file=sys.stderr)
+
+
+def _run_episode(index, input_path, streaming, log_dir):
+    """
+    Processes one episode in a worker; its console output goes to a per-episode log.
+    `index` (the episode's position in the batch) prefixes the log name, so episodes
+    with the same file name in different directories never share a log.
+    """
+    from main import process_audio
+
+    started = time.time()
+    entry = {"input": input_path, "worker": os.getpid()}
+    log_path = os.path.join(log_dir, f"{index:04d}_{os.path.splitext(os.path.basename(input_path))[0]}.log")
+    entry["log"] = log_path
+
+    with open(log_path, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        try:
+            result = process_audio(input_path, streaming=streaming)
+            (details,) = result.values()
+            entry.update(status="ok", uuid=details["uuid"], url=details["url"],
+                         transcript_uuid=details["transcript_uuid"],
+                         final_output=os.path.join("output", f"{details['uuid']}_final_output.json"))
+        except Exception as e:
+            traceback.print_exc(file=log)
+            entry.update(status="error", error=f"{type(e).__name__}: {e}")
+
+    entry["seconds"] = round(time.time() - started, 2)
+    return entry
+
+
+def run_batch(inputs, manifest_path=DEFAULT_MANIFEST, workers=2, streaming=False, resume=False):
+    """
+    Processes `inputs` across `workers` processes and appends one result line
+    per episode to `manifest_path`.
+
+    Returns:
+        list: The manifest entries written by this run.
+    """
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    log_dir = os.path.join(os.path.dirname(manifest_path) or ".", "logs")
+    os.makedirs(log_dir, exist_ok=True)
+
+    if resume:
+        completed = load_completed(manifest_path)
+        skipped = [p for p in inputs if os.path.abspath(p) in completed]
+        inputs = [p for p in inputs if os.path.abspath(p) not in completed]
+        if skipped:
+            print(f"↩️ Skipping {len(skipped)} episode(s) already in {manifest_path}")
+
+    if not inputs:
+        print("✅ Nothing to process.")
+        return []
+
+    print(f"📦 Processing {len(inputs)} episode(s) with {workers} worker(s)...")
+    entries = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool, \
+            open(manifest_path, "a", encoding="utf-8") as manifest:
+        futures = {pool.submit(_run_episode, i, p, streaming, log_dir): p for i, p in enumerate(inputs)}
+        for future in as_completed(futures):
+            try:
+                entry = future.result()
+            except Exception as e:  # The worker itself died (e.g. out of memory)
+                entry = {"input": futures[future], "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+            manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            manifest.flush()
+            entries.append(entry)
+
+            mark = "✅" if entry["status"] == "ok" else "❌"
+            print(f"{mark} [{len(entries)}/{len(inputs)}] {entry['input']} "
+                  f"{entry.get('url') or entry.get('error')}")
+
+    failed = sum(1 for e in entries if e["status"] != "ok")
+    print(f"\n🎉 Batch done: {len(entries) - failed} ok, {failed} failed. Manifest: {manifest_path}")
+    return entries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Process a directory or manifest of audio episodes.')
+    parser.add_argument('source', type=str, help='Directory of audio files, or a .txt/.json list of paths')
+    parser.add_argument('--workers', type=int, default=2, help='Number of worker processes')
+    parser.add_argument('--manifest', type=str, default=DEFAULT_MANIFEST, help='Result manifest (JSONL)')
+    parser.add_argument('--streaming', action='store_true', help='Use bounded-memory streaming mode')
+    parser.add_argument('--resume', action='store_true', help='Skip episodes already marked ok in the manifest')
+    args = parser.parse_args()
+
+    entries = run_batch(collect_inputs(args.source), manifest_path=args.manifest,
+                        workers=args.workers, streaming=args.streaming, resume=args.resume)
+    sys.exit(1 if any(e["status"] != "ok" for e in entries) else 0)
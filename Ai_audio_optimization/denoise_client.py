@@ -0,0 +1,220 @@
+import io
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+import soundfile as sf  # type: ignore
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry  # type: ignore
+
+
+class DenoiseClient:
+    """
+    Chunked, concurrent client for the hosted DeepFilterNet service.
+
+    The input buffer is cut into overlapping chunks, each chunk is sent as
+    FLAC over a pooled keep-alive session, several chunks are in flight at
+    once, and the denoised chunks are crossfaded back together in order.
+    Finished audio is yielded block by block, so callers can stream it to
+    disk instead of holding the whole response in memory.
+    """
+
+    def __init__(self, url, chunk_sec=30.0, overlap_sec=0.5, max_workers=4,
+                 timeout=(10, 120), retries=3, upload_format="FLAC"):
+        """
+        Args:
+            url (str): Denoise endpoint (multipart POST with a "file" field).
+            chunk_sec (float): Length of each chunk sent to the service.
+            overlap_sec (float): Overlap between consecutive chunks, crossfaded on reassembly.
+            max_workers (int): Chunks processed concurrently.
+            timeout (tuple): (connect, read) timeout in seconds per request.
+            retries (int): Retries per chunk on connection errors and 5xx responses.
+            upload_format (str): soundfile format used for uploads ("FLAC" or "WAV").
+        """
+        if not url:
+            raise EnvironmentError("ZROK_DENOISE_URL is not set in environment variables.")
+        if overlap_sec * 2 >= chunk_sec:
+            raise ValueError("overlap_sec must be less than half of chunk_sec")
+
+        self.url = url
+        self.chunk_sec = chunk_sec
+        self.overlap_sec = overlap_sec
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.upload_format = upload_format.upper()
+
+        retry = Retry(total=retries, backoff_factor=0.5,
+                      status_forcelist=(502, 503, 504), allowed_methods=frozenset({"POST"}))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            url=os.getenv("ZROK_DENOISE_URL"),
+            chunk_sec=float(os.getenv("DENOISE_CHUNK_SEC", "30")),
+            overlap_sec=float(os.getenv("DENOISE_OVERLAP_SEC", "0.5")),
+            max_workers=int(os.getenv("DENOISE_WORKERS", "4")),
+            timeout=(10, float(os.getenv("DENOISE_TIMEOUT", "120"))),
+            upload_format=os.getenv("DENOISE_UPLOAD_FORMAT", "FLAC"),
+        )
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _iter_chunks(self, blocks, sr):
+        """
+        Cuts a stream of blocks into overlapping chunks, yielding (chunk, is_last).
+        Only about one chunk of input is buffered at a time.
+        """
+        chunk = int(round(self.chunk_sec * sr))
+        hop = chunk - int(round(self.overlap_sec * sr))
+        buffer = None
+        for block in blocks:
+            if not len(block):
+                continue
+            buffer = block if buffer is None else np.concatenate([buffer, block])
+            # A chunk is emitted only once data beyond it exists, so the last one is known
+            while len(buffer) > chunk:
+                yield buffer[:chunk], False
+                buffer = buffer[hop:]
+        if buffer is not None and len(buffer):
+            yield buffer, True
+
+    def _denoise_chunk(self, chunk, sr):
+        payload = io.BytesIO()
+        sf.write(payload, chunk, sr, format=self.upload_format, subtype="PCM_16")
+        ext = self.upload_format.lower()
+        files = {"file": (f"chunk.{ext}", payload.getvalue(), f"audio/{ext}")}
+
+        response = self.session.post(self.url, files=files, timeout=self.timeout)
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to denoise audio: {response.status_code} - {response.text[:200]}")
+
+        denoised, out_sr = sf.read(io.BytesIO(response.content), dtype="float32", always_2d=False)
+        return denoised, out_sr
+
+    def iter_denoised(self, audio, sr):
+        """
+        Yield (block, sample_rate) pieces of the denoised signal in order.
+
+        Consecutive chunks overlap by `overlap_sec`; the overlap is blended
+        with a linear crossfade, so the concatenated blocks form one
+        continuous signal.
+        """
+        return self.iter_denoised_stream([audio], sr)
+
+    def iter_denoised_stream(self, blocks, sr):
+        """
+        Same as iter_denoised, but reads the input from an iterable of blocks
+        (e.g. a file decoded piece by piece), so neither input nor output
+        has to be held in memory as a whole.
+        """
+        window = self.max_workers * 2
+        tail = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            chunks = self._iter_chunks(blocks, sr)
+            pending = deque()
+            exhausted = False
+
+            while not exhausted or pending:
+                # Keep a bounded window in flight so encoded payloads don't pile up in memory
+                while not exhausted and len(pending) < window:
+                    item = next(chunks, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    chunk, is_last = item
+                    future = executor.submit(self._denoise_chunk, chunk, sr)
+                    pending.append((len(chunk), is_last, future))
+
+                if not pending:
+                    break
+                length, is_last, future = pending.popleft()
+                try:
+                    denoised, out_sr = future.result()
+                except Exception:
+                    for _, _, other in pending:
+                        other.cancel()
+                    raise
+
+                # Pin each chunk to its expected length at the output rate to keep alignment
+                expected = int(round(length * out_sr / sr))
+                denoised = _fit_length(denoised, expected)
+                overlap = min(int(round(self.overlap_sec * out_sr)), len(denoised))
+
+                if tail is not None:
+                    fade = np.linspace(0.0, 1.0, len(tail), dtype=np.float32)
+                    if denoised.ndim > 1:
+                        fade = fade[:, None]
+                    head = denoised[:len(tail)]
+                    denoised[:len(tail)] = tail * (1.0 - fade) + head * fade
+
+                if is_last:
+                    yield denoised, out_sr
+                    tail = None
+                else:
+                    yield denoised[:len(denoised) - overlap], out_sr
+                    tail = denoised[len(denoised) - overlap:].copy()
+
+    def denoise(self, audio, sr):
+        """Denoise a float32 buffer; returns (denoised, sample_rate)."""
+        blocks = []
+        out_sr = sr
+        for block, out_sr in self.iter_denoised(audio, sr):
+            blocks.append(block)
+        if not blocks:
+            return audio[:0].copy(), sr
+        return np.concatenate(blocks), out_sr
+
+    def denoise_to_file(self, audio, sr, output_path, subtype="PCM_16"):
+        """Denoise a float32 buffer and stream the result to `output_path` as it arrives."""
+        out_file = None
+        out_sr = sr
+        try:
+            for block, out_sr in self.iter_denoised(audio, sr):
+                if out_file is None:
+                    channels = 1 if block.ndim == 1 else block.shape[1]
+                    out_file = sf.SoundFile(output_path, "w", samplerate=out_sr,
+                                            channels=channels, subtype=subtype)
+                out_file.write(block)
+        finally:
+            if out_file is not None:
+                out_file.close()
+        return output_path, out_sr
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_denoise_client():
+    """
+    Process-wide DenoiseClient built from the environment, so every file a
+    worker processes reuses the same pooled keep-alive connections.
+    """
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = DenoiseClient.from_env()
+        return _shared_client
+
+
+def _fit_length(samples, length):
+    if len(samples) >= length:
+        return samples[:length].copy()
+    pad = np.zeros((length - len(samples),) + samples.shape[1:], dtype=samples.dtype)
+    return np.concatenate([samples, pad])
@@ -0,0 +1,29 @@
+"""
+Local stand-in for the hosted DeepFilterNet service.
+
+Accepts the same multipart "file" upload and returns the audio unchanged as
+WAV, so DenoiseClient can be exercised without the tunnel:
+
+    uvicorn denoise_stub_server:app --port 8000
+    ZROK_DENOISE_URL=http://127.0.0.1:8000/denoise python main.py
+"""
+import io
+
+import soundfile as sf  # type: ignore
+from fastapi import FastAPI, File, UploadFile  # type: ignore
+from fastapi.responses import Response  # type: ignore
+
+app = FastAPI()
+
+
+@app.post("/denoise")
+async def denoise(file: UploadFile = File(...)):
+    samples, sr = sf.read(io.BytesIO(await file.read()), dtype="float32", always_2d=False)
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sr, format="WAV", subtype="PCM_16")
+    return Response(content=buffer.getvalue(), media_type="audio/wav")
+
+
+if __name__ == "__main__":
+    import uvicorn  # type: ignore
+    uvicorn.run(app, host="127.0.0.1", port=8000)
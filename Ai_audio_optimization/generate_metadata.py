@@ -1,11 +1,50 @@
 import os
+import glob
 import json
+import hashlib
 from openai import OpenAI  # new SDK usage
 from dotenv import load_dotenv
 
+from word_index import WordIndex
+
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+METADATA_MODEL = "gpt-4"
+METADATA_CACHE_DIR = os.path.join("cache", "podcast_metadata")
+DIGEST_CACHE_DIR = os.path.join("cache", "transcript_digests")
+DIGEST_THRESHOLD_CHARS = 12000   # Longer transcripts are condensed once before metadata generation
+DIGEST_SECTION_SEC = 300         # Timestamped section length fed to the digest when word timings exist
+
+PLATFORM_GUIDELINES = {
+    "Apple Podcasts": """- Title: Clear, short, keyword-friendly.
+- Description: Up to 4000 characters. Include a show summary, guest mentions (if any), social or contact info, and SEO-relevant keywords. Do not use markdown formatting.""",
+    "Spotify": """- Title: Direct and creative, still keyword-aware.
+- Description: Use an engaging tone. Clickable links are allowed. Emphasize emotional or narrative hooks for algorithmic discovery.""",
+}
+PLATFORM_ALIASES = {"apple": "Apple Podcasts", "spotify": "Spotify"}
+DEFAULT_PLATFORMS = ["Apple Podcasts", "Spotify"]
+GENERIC_GUIDELINES = "- Title: Short.\n- Description: A concise podcast description."
+
+DIGEST_PROMPT = """Condense this podcast transcript into a detailed digest of at most 600 words.
+{order} notable claims and stories, guest names, and any links,
+handles or contact details that are mentioned. Do not use markdown formatting.
+
+Transcript:
+{body}
+"""
+METADATA_PROMPT = """Generate a podcast title and description for each of the following platforms,
+following each platform's guidelines.
+
+{sections}
+
+Transcript:
+{context}
+
+Return only a JSON object whose keys are exactly the platform names above, each mapping to
+an object with keys "title" and "description".
+"""
+
 
 def load_transcript(uuid, output_dir="output"):
     path = os.path.join(output_dir, f"{uuid}.txt")
@@ -15,47 +54,145 @@ def load_transcript(uuid, output_dir="output"):
         return f.read()
 
 
-def generate_metadata(prompt_text, platform):
-    if platform.lower() == "apple":
-        platform_prompt = """
-Generate a podcast title and description optimized for **Apple Podcasts**.
-- Title: Clear, short, keyword-friendly.
-- Description: Up to 4000 characters. Include a show summary, guest mentions (if any), social or contact info, and SEO-relevant keywords. Do not use markdown formatting.
-Return a JSON with "title" and "description".
-"""
-    elif platform.lower() == "spotify":
-        platform_prompt = """
-Generate a podcast title and description optimized for **Spotify**.
-- Title: Direct and creative, still keyword-aware.
-- Description: Use an engaging tone. Clickable links are allowed. Emphasize emotional or narrative hooks for algorithmic discovery.
-Return a JSON with "title" and "description".
-"""
-    else:
-        platform_prompt = "Generate a JSON with a short podcast title and description."
+def _canonical_platform(platform):
+    return PLATFORM_ALIASES.get(platform.lower(), platform)
 
-    prompt = f"""{platform_prompt}
 
-Transcript:
-{prompt_text}
+def _hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-Return only JSON with keys: "title" and "description".
-"""
 
+def _read_cache(cache_dir, key):
+    path = os.path.join(cache_dir, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _write_cache(cache_dir, key, value):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_word_index(uuid, output_dir="output"):
+    """The transcript's WordIndex if one was saved next to it, else None."""
+    path = os.path.join(output_dir, f"{uuid}_words.idx")
+    return WordIndex.load(path) if os.path.exists(path) else None
+
+
+def _timestamped_sections(word_index):
+    return "\n\n".join(
+        f"[{int(start) // 60:02d}:{int(start) % 60:02d}] {text}"
+        for start, text in word_index.sections(DIGEST_SECTION_SEC)
+    )
+
+
+def transcript_digest(transcript_text, word_index: WordIndex | None = None):
+    """
+    Returns the text used as metadata context: the transcript itself when it
+    is short, otherwise a condensed digest that is generated once per
+    transcript and cached by the hash of the model and the full prompt.
+
+    With a word index, the transcript is sent as timestamped sections so the
+    digest can keep where each topic starts.
+    """
+    if len(transcript_text) <= DIGEST_THRESHOLD_CHARS:
+        return transcript_text
+
+    if word_index is not None and len(word_index):
+        body = _timestamped_sections(word_index)
+        order = "Keep the main topics in order with the [mm:ss] time each one starts,"
+    else:
+        body = transcript_text
+        order = "Keep the main topics in order,"
+    prompt = DIGEST_PROMPT.format(order=order, body=body)
+
+    key = _hash_text(f"{METADATA_MODEL}\n{prompt}")
+    cached = _read_cache(DIGEST_CACHE_DIR, key)
+    if cached:
+        return cached["digest"]
+
+    print(f"🗜️ Condensing transcript ({len(transcript_text)} chars) into a digest...")
     response = client.chat.completions.create(
-        model="gpt-4",
+        model=METADATA_MODEL,
         messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
+        temperature=0.3,
     )
+    digest = response.choices[0].message.content.strip()
+    _write_cache(DIGEST_CACHE_DIR, key, {"digest": digest})
+    return digest
+
+
+def generate_platform_metadata(transcript_text, platforms=None, word_index: WordIndex | None = None):
+    """
+    Generates a podcast title and description for every platform in one request.
+
+    Results are cached per transcript, model and prompt template, with one
+    entry per platform and guidelines text, so repeat runs are free, editing
+    the prompt or a platform's guidelines regenerates it, and a newly added
+    platform only asks for the missing entries, still in a single call.
+
+    `word_index` (the transcript's WordIndex) only shapes the digest of long
+    transcripts; see transcript_digest.
+
+    Returns:
+        dict: {platform: {"title": str, "description": str}}
+    """
+    platforms = [_canonical_platform(p) for p in (platforms or DEFAULT_PLATFORMS)]
+    key = _hash_text(f"{METADATA_MODEL}\n{METADATA_PROMPT}\n{transcript_text}")
+    cached = _read_cache(METADATA_CACHE_DIR, key) or {}
+    guidelines = {p: PLATFORM_GUIDELINES.get(p, GENERIC_GUIDELINES) for p in platforms}
+    entry_keys = {p: f"{p}#{_hash_text(guidelines[p])[:12]}" for p in platforms}
+
+    missing = [p for p in dict.fromkeys(platforms) if entry_keys[p] not in cached]
+    if missing:
+        context = transcript_digest(transcript_text, word_index)
+        sections = "\n\n".join(f'"{p}":\n{guidelines[p]}' for p in missing)
+        prompt = METADATA_PROMPT.format(sections=sections, context=context)
+        print(f"🧠 Generating metadata for: {', '.join(missing)}")
+        response = client.chat.completions.create(
+            model=METADATA_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+        )
+        content = response.choices[0].message.content.strip()
+
+        try:
+            # gpt-4 has no JSON mode; tolerate a ```json fence around the object
+            generated = json.loads(content.removeprefix("```json").strip("`").strip())
+        except json.JSONDecodeError:
+            generated = {}
+        if not isinstance(generated, dict):
+            generated = {}
+
+        complete = True
+        for platform in missing:
+            entry = generated.get(platform)
+            if isinstance(entry, dict) and entry.get("title") and entry.get("description"):
+                cached[entry_keys[platform]] = {"title": entry["title"], "description": entry["description"]}
+            else:
+                complete = False
+        if any(entry_keys[p] in cached for p in missing):
+            _write_cache(METADATA_CACHE_DIR, key, cached)
+        if not complete:
+            print("⚠️ Metadata response was incomplete; missing platforms were not cached.")
+
+    # As before, an unusable response is passed through as the description
+    fallback = {"title": "Untitled Podcast", "description": content if missing else ""}
+    return {p: cached.get(entry_keys[p], fallback) for p in platforms}
 
-    content = response.choices[0].message.content.strip()
 
-    try:
-        return json.loads(content)
-    except Exception:
-        return {
-            "title": "Untitled Podcast",
-            "description": content
-        }
+def generate_metadata(prompt_text, platform):
+    """Single-platform wrapper around generate_platform_metadata."""
+    return generate_platform_metadata(prompt_text, [platform])[_canonical_platform(platform)]
 
 
 def update_metadata_file(meta_path):
@@ -67,11 +204,14 @@ def update_metadata_file(meta_path):
         print(f"⚠️ Skipping {meta_path} — No transcript_uuid found.")
         return
 
-    transcript = load_transcript(uuid)
+    # Transcripts live next to their meta file (in the run's artifact directory)
+    transcript = load_transcript(uuid, os.path.dirname(meta_path))
+    word_index = load_word_index(uuid, os.path.dirname(meta_path))
 
     print(f"🎧 Generating metadata for: {uuid}")
-    apple = generate_metadata(transcript, "Apple Podcasts")
-    spotify = generate_metadata(transcript, "Spotify")
+    podcast_meta = generate_platform_metadata(transcript, ["Apple Podcasts", "Spotify"], word_index)
+    apple = podcast_meta["Apple Podcasts"]
+    spotify = podcast_meta["Spotify"]
 
     meta.update({
         "apple_podcast_title": apple["title"],
@@ -89,10 +229,11 @@ def update_metadata_file(meta_path):
 def main(output_dir="output"):
     print(f"🔍 Scanning {output_dir} for transcript metadata...")
 
-    for filename in os.listdir(output_dir):
-        if filename.endswith("_meta.json"):
-            meta_path = os.path.join(output_dir, filename)
-            update_metadata_file(meta_path)
+    # Legacy flat layout plus per-run artifact directories (output/runs/<run_id>/)
+    meta_paths = glob.glob(os.path.join(output_dir, "*_meta.json"))
+    meta_paths += glob.glob(os.path.join(output_dir, "runs", "*", "*_meta.json"))
+    for meta_path in meta_paths:
+        update_metadata_file(meta_path)
 
 
 if __name__ == "__main__":
@@ -129,20 +129,19 @@
 
 import os
 import argparse
-import tempfile
 import uuid
 import json
 
-import torchaudio  # type: ignore
-from pydub import AudioSegment  # type: ignore
 from dotenv import load_dotenv
 
 import cloudinary  # type: ignore
-import cloudinary.uploader  # type: ignore
 
-from utils import mp3_to_wav
+from audio_io import load_audio
 from audio_fn import denoise_audio, normalize_audio, disfluency_removal
-from generate_metadata import generate_metadata  # <- your function from earlier
+from artifacts import RunArtifacts
+from delivery import start_delivery
+from streaming import process_streaming
+from generate_metadata import generate_platform_metadata
 
 # Load .env and configure Cloudinary
 load_dotenv()
@@ -153,7 +152,13 @@ cloudinary.config(
     api_secret=os.getenv("CLOUDINARY_API_SECRET")
 )
 
-def process_audio(input_audio_path):
+def process_audio(input_audio_path, streaming=False):
+    """
+    Runs the full pipeline on one file.
+
+    With streaming=True the audio stages run block by block (see streaming.py),
+    for multi-hour episodes that should not be loaded into memory at once.
+    """
     # 🔹 Step 0: Generate UUID and announce it
     file_uuid = str(uuid.uuid4())
     print(f"session started for UUID: {file_uuid}")
@@ -162,74 +167,49 @@ def process_audio(input_audio_path):
     output_dir = "output"
     os.makedirs(output_dir, exist_ok=True)
     final_output_path = os.path.join(output_dir, f"{file_uuid}_final.wav")
+    artifacts = RunArtifacts(file_uuid)
 
-    # Step 1: Convert to WAV if needed
-    if not input_audio_path.lower().endswith(".wav"):
-        print(f"🎵 Converting '{input_audio_path}' to WAV format...")
-        wav_path = mp3_to_wav(input_audio_path)
+    if streaming:
+        # Steps 1-4 in fixed-size blocks: memory stays flat however long the episode is
+        print("\n=== Steps 1-3: Denoising, Disfluency Removal, Normalization (streaming) ===")
+        transcript = process_streaming(input_audio_path, final_output_path, artifacts)
     else:
-        wav_path = input_audio_path
+        # Step 1: Decode input once into a float32 buffer (the only read from disk)
+        print(f"🎵 Loading '{input_audio_path}'...")
+        audio, sr = load_audio(input_audio_path)
+
+        # Step 2: Denoising
+        print("\n=== Step 1: Denoising ===")
+        denoised_audio, sr = denoise_audio(audio, sr)
 
-    # Step 2: Denoising
-    print("\n=== Step 1: Denoising ===")
-    denoised_path, sr = denoise_audio(wav_path)
+        # Step 3: Disfluency Removal
+        print("\n=== Step 2: Disfluency Removal ===")
+        cleaned_audio, transcript = disfluency_removal(denoised_audio, sr, artifacts)
 
-    # Load denoised audio for torchaudio processing
-    waveform, sr = torchaudio.load(denoised_path)
-    if waveform.dim() == 1:
-        waveform = waveform.unsqueeze(0)
-    elif waveform.dim() == 3:
-        waveform = waveform[0]
+        # Step 4: Normalization (the only write to disk)
+        print("\n=== Step 3: Normalization ===")
+        normalize_audio(cleaned_audio, sr, final_output_path)
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_wav_file:
-        torchaudio.save(temp_wav_file.name, waveform, sample_rate=sr)
-        denoised_wav_path = temp_wav_file.name
+    print(f"\n🎉 Done! Final processed audio saved at: {final_output_path}")
 
-    # Step 3: Disfluency Removal
-    denoised_audio_segment = AudioSegment.from_wav(denoised_wav_path)
-    print("\n=== Step 2: Disfluency Removal ===")
-    cleaned_audio = disfluency_removal(denoised_audio_segment, sr)
+    # Step 5: Encode and upload to Cloudinary in the background
+    print("\n☁️ Uploading to Cloudinary in the background...")
+    delivery = start_delivery(final_output_path, destination="cloudinary", folder="enhanced_audio")
 
-    # Step 4: Normalization
-    print("\n=== Step 3: Normalization ===")
-    normalize_audio(cleaned_audio, final_output_path)
+    # Step 6: Transcript comes straight from the disfluency stage
+    transcript_uuid = transcript.transcript_uuid
+    transcript_text = transcript.text
 
-    print(f"\n🎉 Done! Final processed audio saved at: {final_output_path}")
+    # Step 7: Generate Podcast Metadata (every platform in one request), overlapping the upload
+    podcast_meta = generate_platform_metadata(transcript_text, ["Apple Podcasts", "Spotify"],
+                                              transcript.word_index)
+    apple_meta = podcast_meta["Apple Podcasts"]
+    spotify_meta = podcast_meta["Spotify"]
 
-    # Step 5: Upload to Cloudinary
-    print("\n☁️ Uploading to Cloudinary...")
-    upload_result = cloudinary.uploader.upload_large(
-        final_output_path,
-        resource_type="video",  # audio is treated as video on Cloudinary
-        folder="enhanced_audio"
-    )
-    cloud_url = upload_result["secure_url"]
-
-    # Step 6: Load transcript UUID from metadata
-    meta_path = next(
-        (os.path.join(output_dir, f) for f in os.listdir(output_dir) if f.endswith("_meta.json")),
-        None
-    )
-
-    if not meta_path:
-        print("❌ No metadata file found.")
-        return
-
-    with open(meta_path, "r", encoding="utf-8") as f:
-        meta = json.load(f)
-    transcript_uuid = meta.get("transcript_uuid")
-
-    if not transcript_uuid:
-        print("❌ transcript_uuid missing in meta file.")
-        return
-
-    transcript_path = os.path.join(output_dir, f"{transcript_uuid}.txt")
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        transcript_text = f.read()
-
-    # Step 7: Generate Podcast Metadata
-    apple_meta = generate_metadata(transcript_text, platform="Apple Podcasts")
-    spotify_meta = generate_metadata(transcript_text, platform="Spotify")
+    delivered = delivery.result()
+    cloud_url = delivered["url"]
+    artifacts.record("delivery_audio", delivered["path"])
+    print(f"✅ Uploaded: {cloud_url}")
 
     # Step 8: Save full result JSON using UUID as filename
     result = {
@@ -247,6 +227,8 @@ def process_audio(input_audio_path):
     json_output_path = os.path.join(output_dir, f"{file_uuid}_final_output.json")
     with open(json_output_path, "w", encoding="utf-8") as f:
         json.dump(result, f, indent=2)
+    artifacts.record("final_audio", final_output_path)
+    artifacts.record("final_output", json_output_path)
 
     print(f"\n✅ All done! Output saved to: {json_output_path}")
     return result
@@ -255,5 +237,7 @@ def process_audio(input_audio_path):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Process and enhance audio file.')
     parser.add_argument('input_path', type=str, help='Path to input audio file (WAV or MP3)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Process in fixed-size blocks with bounded memory (for long episodes)')
     args = parser.parse_args()
-    process_audio(args.input_path)
+    process_audio(args.input_path, streaming=args.streaming)
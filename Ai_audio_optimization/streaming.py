@@ -0,0 +1,142 @@
+import json
+import uuid
+import itertools
+import subprocess
+import numpy as np
+import soundfile as sf  # type: ignore
+
+from vad import detect_speech
+from loudness import iter_normalized
+from denoise_client import get_denoise_client
+from audio_fn import remove_disfluencies
+from artifacts import RunArtifacts, TranscriptResult
+
+# Streaming-mode block sizes (seconds). Peak memory is bounded by these,
+# not by the length of the episode.
+READ_BLOCK_SEC = 30.0
+SEGMENT_SEC = 120.0       # Aim to cut the denoised stream into segments of about this length...
+SEGMENT_MIN_SEC = 20.0    # ...at a silence no earlier than this...
+SEGMENT_MAX_SEC = 300.0   # ...and force a cut here if no silence was found.
+
+
+def probe_audio_format(path):
+    """Returns (sample_rate, channels) of the first audio stream."""
+    result = subprocess.run([
+        "ffprobe", "-v", "error", "-select_streams", "a:0",
+        "-show_entries", "stream=sample_rate,channels", "-of", "json", path
+    ], check=True, capture_output=True, text=True)
+    stream = json.loads(result.stdout)["streams"][0]
+    return int(stream["sample_rate"]), int(stream["channels"])
+
+
+def iter_input_blocks(path, sr, channels, block_sec=READ_BLOCK_SEC):
+    """
+    Decodes any ffmpeg-readable file into float32 blocks of `block_sec`
+    through a pipe, without ever holding the whole recording.
+    """
+    frame_bytes = 4 * channels
+    block_bytes = int(sr * block_sec) * frame_bytes
+    process = subprocess.Popen([
+        "ffmpeg", "-v", "error", "-i", path, "-vn",
+        "-f", "f32le", "-acodec", "pcm_f32le", "-ar", str(sr), "-ac", str(channels), "pipe:1"
+    ], stdout=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            block = np.frombuffer(data[:len(data) - len(data) % frame_bytes], dtype="<f4")
+            yield block if channels == 1 else block.reshape(-1, channels)
+    finally:
+        process.stdout.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"❌ ffmpeg failed to decode {path}")
+
+
+def _silence_cut(buffer, sr, min_sec, max_sec):
+    """
+    Picks a cut point (in frames) in the middle of the latest silence gap
+    between min_sec and the end of `buffer`. Returns None if there is none yet,
+    unless the buffer has reached max_sec, in which case it cuts at max_sec.
+    """
+    window = buffer[:int(max_sec * sr)]
+    regions = detect_speech(window, sr).regions
+    gaps = [(end + start) / 2 for (_, end), (start, _) in zip(regions, regions[1:])]
+    gaps = [g for g in gaps if g >= min_sec]
+    if gaps:
+        return int(gaps[-1] * sr)
+    if len(buffer) >= max_sec * sr:
+        return int(max_sec * sr)
+    return None
+
+
+def iter_speech_segments(blocks, sr, target_sec=SEGMENT_SEC, min_sec=SEGMENT_MIN_SEC, max_sec=SEGMENT_MAX_SEC):
+    """
+    Regroups a stream of blocks into segments that end in silence, so no word
+    ever straddles a segment edge and each segment can be transcribed and cut
+    on its own.
+    """
+    buffer = None
+    for block in blocks:
+        buffer = block if buffer is None else np.concatenate([buffer, block])
+        while len(buffer) >= target_sec * sr:
+            cut = _silence_cut(buffer, sr, min_sec, max_sec)
+            if cut is None:
+                break
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+    if buffer is not None and len(buffer):
+        yield buffer
+
+
+def process_streaming(input_path, output_path, artifacts: RunArtifacts | None = None):
+    """
+    Bounded-memory version of load → denoise → disfluency removal → normalization.
+
+    The input is decoded in fixed blocks, denoised through the chunked
+    client, regrouped into silence-bounded segments for transcription and
+    filler cutting, then compressed, normalized and limited in streaming mode
+    and written incrementally to `output_path`.
+
+    Returns:
+        TranscriptResult: The transcript of the whole episode, in the timeline
+            of the denoised audio.
+    """
+    artifacts = artifacts or RunArtifacts(str(uuid.uuid4()))
+    sr, channels = probe_audio_format(input_path)
+    print(f"🌊 Streaming mode: {sr} Hz, {channels} ch, {READ_BLOCK_SEC:.0f}s read blocks")
+
+    texts = []
+    words = []
+
+    def cleaned_segments(segments, out_sr):
+        offset = 0.0
+        for segment in segments:
+            print(f"\n✂️ Segment at {offset / 60:.1f} min ({len(segment) / out_sr:.0f}s)")
+            cleaned, text, segment_words = remove_disfluencies(segment, out_sr)
+            texts.append(text)
+            words.extend({**w, "start": round(w["start"] + offset, 2), "end": round(w["end"] + offset, 2)}
+                         for w in segment_words)
+            offset += len(segment) / out_sr
+            yield cleaned
+
+    client = get_denoise_client()
+    denoised = client.iter_denoised_stream(iter_input_blocks(input_path, sr, channels), sr)
+    first = next(denoised, None)
+    if first is None:
+        raise RuntimeError(f"❌ No audio decoded from {input_path}")
+
+    # The service decides the output rate; it is known once the first chunk is back
+    first_block, out_sr = first
+    out_channels = 1 if first_block.ndim == 1 else first_block.shape[1]
+    blocks = itertools.chain([first_block], (block for block, _ in denoised))
+    segments = cleaned_segments(iter_speech_segments(blocks, out_sr), out_sr)
+
+    with sf.SoundFile(output_path, "w", samplerate=out_sr, channels=out_channels, subtype="PCM_16") as out:
+        for block in iter_normalized(segments, out_sr, out_channels):
+            out.write(block)
+
+    print(f"✅ Streamed output written to: {output_path}")
+    return artifacts.save_transcript(
+        TranscriptResult(transcript_uuid=str(uuid.uuid4()), text=" ".join(t for t in texts if t), words=words)
+    )
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+from pydub import AudioSegment  # type: ignore
+
+os.environ.setdefault("OPENAI_API_KEY", "test")  # utils builds an OpenAI client on import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import splice_intervals  # noqa: E402
+
+SR = 16000
+FADE_MS = 20
+
+
+def _audio():
+    rng = np.random.default_rng(0)
+    pcm = (rng.standard_normal(SR * 2) * 3000).astype(np.int16)
+    return pcm, AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=SR, channels=1)
+
+
+def _pydub_splice(audio, intervals):
+    out = AudioSegment.empty()
+    for start, end in intervals:
+        out += audio[start * 1000:end * 1000].fade_in(FADE_MS).fade_out(FADE_MS)
+    return np.frombuffer(out.raw_data, dtype=np.int16)
+
+
+def test_short_pieces_match_pydub():
+    pcm, audio = _audio()
+    # 50 ms and 30 ms pieces: under 100 ms, but longer than the fade
+    for intervals in ([(0.1, 0.15)], [(0.1, 0.13), (0.3, 1.0)]):
+        expected = _pydub_splice(audio, intervals)
+        spliced = splice_intervals(pcm.astype(np.float32), SR, intervals, FADE_MS)
+        assert len(spliced) == len(expected)
+        assert np.abs(np.rint(spliced) - expected).max() <= 2  # pydub truncates, we keep float
+
+
+def test_sub_fade_pieces_are_dropped():
+    pcm, audio = _audio()
+    spliced = splice_intervals(pcm.astype(np.float32), SR, [(0.1, 0.15), (0.5, 0.51), (0.6, 1.0)], FADE_MS)
+    assert len(spliced) == len(_pydub_splice(audio, [(0.1, 0.15), (0.6, 1.0)]))
+    assert len(splice_intervals(pcm.astype(np.float32), SR, [(0.5, 0.51)], FADE_MS)) == 0
@@ -0,0 +1,68 @@
+"""
+Local stand-in for the Cloudinary chunked upload endpoint.
+
+Accepts the same multipart chunks (X-Unique-Upload-Id + Content-Range
+headers), assembles them on disk and answers the final chunk with a
+`secure_url`, so delivery.ChunkedUploader can be exercised offline:
+
+    uvicorn upload_stub_server:app --port 8001
+    AUDIO_UPLOAD_URL=http://127.0.0.1:8001/upload python main.py <audio>
+"""
+import os
+import re
+
+from fastapi import FastAPI, File, Form, Header, HTTPException, UploadFile  # type: ignore
+from fastapi.responses import FileResponse  # type: ignore
+
+STUB_DIR = os.getenv("UPLOAD_STUB_DIR", os.path.join("temp", "upload_stub"))
+RANGE_PATTERN = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+app = FastAPI()
+
+
+@app.post("/upload")
+async def upload(
+    file: UploadFile = File(...),
+    folder: str = Form("uploads"),
+    x_unique_upload_id: str = Header(...),
+    content_range: str = Header(...),
+):
+    match = RANGE_PATTERN.fullmatch(content_range)
+    if not match:
+        raise HTTPException(status_code=400, detail="Invalid Content-Range")
+    start, end, total = (int(g) for g in match.groups())
+
+    data = await file.read()
+    if len(data) != end - start + 1:
+        raise HTTPException(status_code=400, detail="Chunk size does not match Content-Range")
+
+    os.makedirs(STUB_DIR, exist_ok=True)
+    part_path = os.path.join(STUB_DIR, f"{x_unique_upload_id}.part")
+    with open(part_path, "r+b" if os.path.exists(part_path) else "wb") as f:
+        f.seek(start)
+        f.write(data)
+
+    if end + 1 < total:
+        return {"done": False, "received": end + 1}
+
+    name = f"{x_unique_upload_id}_{os.path.basename(file.filename)}"
+    os.replace(part_path, os.path.join(STUB_DIR, name))
+    return {
+        "done": True,
+        "public_id": f"{folder}/{name}",
+        "bytes": total,
+        "secure_url": f"http://127.0.0.1:8001/files/{name}",
+    }
+
+
+@app.get("/files/{name}")
+async def files(name: str):
+    path = os.path.join(STUB_DIR, os.path.basename(name))
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path)
+
+
+if __name__ == "__main__":
+    import uvicorn  # type: ignore
+    uvicorn.run(app, host="127.0.0.1", port=8001)
@@ -1,7 +1,9 @@
 # classifier/classify_transcript.py
 
 import os
+import re
 import json
+import hashlib
 import logging
 from dotenv import load_dotenv
 from openai import OpenAI
@@ -17,6 +19,13 @@ client = OpenAI(api_key=api_key)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# === Verdict cache / heuristic config ===
+VERDICT_CACHE_DIR = os.path.join("cache", "verdicts")
+CLASSIFY_MODEL = "gpt-4o"
+MIN_WORDS = 3              # Only near-empty speech (music, sound effects) is rejected outright
+MIN_UNIQUE_RATIO = 0.2     # Chants, lyrics and repeated memes sit below this
+NON_SPEECH_PATTERN = re.compile(r"\[[^\]]*\]|\([^)]*\)|♪+")
+
 def classify_transcript(transcript_text: str) -> str:
     """
     Classifies a transcript into 'educational' or 'entertainment'.
@@ -70,3 +79,87 @@ def save_summary(summary: str, base_name: str, output_dir: str = "temp/summaries
     with open(path, "w", encoding="utf-8") as f:
         f.write(summary)
     print(f"[💾] Summary saved to {path}")
+
+def is_obviously_non_educational(transcript_text: str) -> bool:
+    """
+    Cheap local check for transcripts that cannot be educational:
+    no real speech (music/sound-effect markers only), or heavy repetition.
+    Short one-liners are left to the model.
+    """
+    spoken = NON_SPEECH_PATTERN.sub(" ", transcript_text)
+    words = re.findall(r"[\w']+", spoken.lower())
+    if len(words) < MIN_WORDS:
+        return True
+    return len(set(words)) / len(words) < MIN_UNIQUE_RATIO
+
+def _load_verdict(key: str):
+    path = os.path.join(VERDICT_CACHE_DIR, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def _save_verdict(key: str, verdict: dict):
+    os.makedirs(VERDICT_CACHE_DIR, exist_ok=True)
+    path = os.path.join(VERDICT_CACHE_DIR, f"{key}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(verdict, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def classify_and_summarize(transcript_text: str) -> dict:
+    """
+    Classifies and summarizes a transcript in one structured LLM call.
+
+    Returns {"label": "educational" | "entertainment", "summary": str}.
+    Verdicts are cached on disk by a hash of the model and the full prompt
+    (template and transcript), and obviously non-educational input is
+    rejected locally without a network call.
+    """
+    if is_obviously_non_educational(transcript_text):
+        logger.info("⏭️ Transcript rejected by local heuristic; skipping LLM call.")
+        return {"label": "entertainment", "summary": ""}
+
+    prompt = f"""Read the following short video transcript and do two things:
+1. Classify it into one of two categories:
+   - 'educational' (Educational / Monologue / Conversation)
+   - 'entertainment' (Entertainment / Junk / Meme / Non-informative)
+2. Summarize the overall topic and message of the video in 1-2 sentences.
+   Use simple language and do not include timestamps or lists.
+
+Return only a JSON object like:
+{{"label": "educational", "summary": "..."}}
+
+Transcript:
+\"\"\"{transcript_text}\"\"\"
+"""
+    # Editing the prompt or switching the model invalidates earlier verdicts
+    key = hashlib.sha256(f"{CLASSIFY_MODEL}\n{prompt}".encode("utf-8")).hexdigest()
+    cached = _load_verdict(key)
+    if cached:
+        logger.info("📦 Using cached classification verdict.")
+        return cached
+
+    try:
+        response = client.chat.completions.create(
+            model=CLASSIFY_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=200,
+            temperature=0.2,
+            response_format={"type": "json_object"},
+        )
+        data = json.loads(response.choices[0].message.content)
+    except Exception as e:
+        logger.error(f"❌ Failed to classify and summarize transcript: {e}")
+        raise
+
+    label = str(data.get("label", "")).strip().lower()
+    verdict = {
+        "label": "educational" if label == "educational" else "entertainment",
+        "summary": str(data.get("summary", "")).strip(),
+    }
+    _save_verdict(key, verdict)
+    return verdict
@@ -116,28 +116,25 @@
 
 import os
 import json
-import shutil
 import argparse
 
+from clip_enhance.workspace import SessionWorkspace
 from clip_enhance.transcripts.transcriber import transcribe_video
-from clip_enhance.classifier.classify_transcript import classify_transcript, summarize_transcript
+from clip_enhance.classifier.classify_transcript import classify_and_summarize
 from clip_enhance.gap_detector.scorer.contextual_gap_detector import score_transcript_chunks
 from clip_enhance.gap_detector.scorer.visual_gap_detector import detect_visual_stagnancy
 from clip_enhance.gap_detector.scorer.scorer import merge_scores
 from clip_enhance.gap_detector.gap_detector import extract_high_scoring_segments
-from clip_enhance.transcripts.clip_transcript import extract_captions_for_gaps, get_forward_only_sentence
+from clip_enhance.transcripts.clip_transcript import TranscriptIndex
 from clip_enhance.generator.image_generator import generate_images_for_gaps
 from clip_enhance.video_editor.injector import insert_multiple_images
-from clip_enhance.video_editor.platform_formatter import process_for_platform
+from clip_enhance.video_editor.platform_formatter import process_for_platforms
 
 # === Config ===
+# Per-job scratch files live in a SessionWorkspace; TEMP_DIR only holds
+# session-keyed artifacts read after the job (e.g. the summary used by generate_metadata).
 TEMP_DIR = "temp"
-TRANSCRIPTS_DIR = os.path.join(TEMP_DIR, "transcripts")
-IMAGES_DIR = os.path.join(TEMP_DIR, "images")
 OUTPUT_VIDEO_DIR = "output"
-CLEAN_TEMP_FILES = False
-
-os.makedirs(TEMP_DIR, exist_ok=True)
 
 def save_json(data, path):
     os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -148,48 +145,51 @@ def load_json(path):
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def clean_temp():
-    if CLEAN_TEMP_FILES and os.path.exists(TEMP_DIR):
-        shutil.rmtree(TEMP_DIR)
-        print("🧹 Temporary files cleaned up.")
-
 def main_short_clip_enhance(video_path, logo_path=None, platforms=None, session_id=None):
+    with SessionWorkspace(session_id) as workspace:
+        run_clip_enhance(workspace, video_path, logo_path=logo_path, platforms=platforms, session_id=session_id)
+
+def run_clip_enhance(workspace, video_path, logo_path=None, platforms=None, session_id=None):
     print(f"\n🎬 Processing: {video_path}")
+    print(f"📂 Workspace: {workspace.path}")
     base_name = os.path.splitext(os.path.basename(video_path))[0]
     prefix = f"{session_id}_" if session_id else ""
 
     # Step 1: Transcribe
-    transcript = transcribe_video(video_path, output_dir=TRANSCRIPTS_DIR, force=True)
+    transcript = transcribe_video(video_path, output_dir=workspace.transcripts_dir, force=True)
     print(f"[📄] Transcript loaded: {len(transcript)} segments")
 
-    # Step 2: Classify
+    # Step 2: Classify and summarize in a single (cached) call
     transcript_text = " ".join([seg["text"] for seg in transcript])
-    label = classify_transcript(transcript_text)
+    verdict = classify_and_summarize(transcript_text)
+    label = verdict["label"]
     print(f"[✅] Classified as: {label}")
 
     if label != "educational":
         print("[🚫] Skipping enhancement. Not educational.")
         return
 
-    # Step 3: Summarize and Save Summary
-    summary = summarize_transcript(transcript_text)
+    # Step 3: Save Summary
+    summary = verdict["summary"]
     print(f"[📘] Summary: {summary}")
 
-    summary_path = os.path.join(TEMP_DIR, f"{prefix}summary.txt")
-    with open(summary_path, "w", encoding="utf-8") as f:
-        f.write(summary)
+    if session_id:
+        os.makedirs(TEMP_DIR, exist_ok=True)
+        summary_path = os.path.join(TEMP_DIR, f"{prefix}summary.txt")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(summary)
 
     # Step 4: Score Transcript and Visuals
     c_scored = score_transcript_chunks(transcript)
-    c_score_path = os.path.join(TEMP_DIR, f"{prefix}c_score.json")
+    c_score_path = workspace.file("c_score.json")
     save_json(c_scored, c_score_path)
 
     v_scored = detect_visual_stagnancy(video_path, persist=False, max_chunk=4.0)
-    v_score_path = os.path.join(TEMP_DIR, f"{prefix}v_score.json")
+    v_score_path = workspace.file("v_score.json")
     save_json(v_scored, v_score_path)
 
     # Step 5: Merge Scores
-    merged_path = os.path.join(TEMP_DIR, f"{prefix}{base_name}_merged_scores.json")
+    merged_path = workspace.file(f"{base_name}_merged_scores.json")
     merge_scores(c_score_path, v_score_path, merged_path)
 
     # Step 6: Extract gaps
@@ -198,35 +198,32 @@ def main_short_clip_enhance(video_path, logo_path=None, platforms=None, session_
     print(f"[🎯] Found {len(gaps)} enhancement-worthy segments.")
 
     # Step 7: Get context
-    enriched_segments = []
-    for seg in gaps:
-        context = get_forward_only_sentence(transcript, seg["start"], seg["end"])
-        enriched_segments.append({**seg, "context": context})
+    transcript_index = TranscriptIndex(transcript)
+    contexts = transcript_index.contexts_for([seg["start"] for seg in gaps])
+    enriched_segments = [{**seg, "context": context} for seg, context in zip(gaps, contexts)]
 
     # Step 8: Generate images
-    image_data = generate_images_for_gaps(enriched_segments, summary, output_dir=IMAGES_DIR)
+    image_data = generate_images_for_gaps(
+        enriched_segments, summary,
+        output_dir=workspace.images_dir,
+        alignment_path=workspace.file("image_prompt_segments.json")
+    )
 
-    segments = []
-    for idx, item in enumerate(image_data):
-        image_path = os.path.join(IMAGES_DIR, f"gap_{idx}.png")
-        segments.append((image_path, item["start"], item["end"]))
+    segments = [(item["image_path"], item["start"], item["end"]) for item in image_data]
 
     # Step 9: Inject visuals
     output_video_path = os.path.join(OUTPUT_VIDEO_DIR, f"{prefix}{base_name}-enhanced.mp4")
     insert_multiple_images(video_path, segments, output_video_path)
     print(f"✅ Final enhanced video saved to: {output_video_path}")
 
-    # Step 10: Optional platform formatting
+    # Step 10: Optional platform formatting (single decode for all platforms)
     if platforms:
-        for platform in platforms:
-            process_for_platform(
-                input_path=output_video_path,
-                output_dir=os.path.join(OUTPUT_VIDEO_DIR, "formatted"),
-                platform=platform,
-                logo_path=logo_path
-            )
-
-    clean_temp()
+        process_for_platforms(
+            input_path=output_video_path,
+            output_dir=os.path.join(OUTPUT_VIDEO_DIR, "formatted"),
+            platforms=platforms,
+            logo_path=logo_path
+        )
 
 # Optional CLI usage (still works as standalone)
 if __name__ == "__main__":
@@ -78,7 +78,8 @@ def save_image_from_b64(b64_data, filename):
         print(f"❌ Failed to save base64 image: {e}")
         return False
     
-def generate_images_for_gaps(gap_contexts, summary, save_to_disk=True, output_dir="images"):
+def generate_images_for_gaps(gap_contexts, summary, save_to_disk=True, output_dir="images",
+                             alignment_path="temp/image_prompt_segments.json"):
     os.makedirs(output_dir, exist_ok=True)
     outputs = []
 
@@ -110,7 +111,7 @@ def generate_images_for_gaps(gap_contexts, summary, save_to_disk=True, output_di
             "image_path": image_path
         })
 
-    # ✅ Save alignment JSON to temp directory
+    # ✅ Save alignment JSON next to the session's scratch files
     aligned_data = [
         {
             "start": item["start"],
@@ -120,11 +121,10 @@ def generate_images_for_gaps(gap_contexts, summary, save_to_disk=True, output_di
         }
         for item in outputs
     ]
-    os.makedirs("temp", exist_ok=True)
-    aligned_json_path = "temp/image_prompt_segments.json"
-    with open(aligned_json_path, "w", encoding="utf-8") as f:
+    os.makedirs(os.path.dirname(alignment_path) or ".", exist_ok=True)
+    with open(alignment_path, "w", encoding="utf-8") as f:
         json.dump(aligned_data, f, indent=2)
-    print(f"📁 Alignment JSON saved to: {aligned_json_path}")
+    print(f"📁 Alignment JSON saved to: {alignment_path}")
 
     return outputs
 
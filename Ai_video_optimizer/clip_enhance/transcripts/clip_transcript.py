@@ -1,8 +1,11 @@
 import json
 import os
 import re
+from bisect import bisect_left
 from typing import List, Dict
 
+import numpy as np
+
 BUFFER = 3.0
 
 def ends_with_sentence(text: str) -> bool:
@@ -19,16 +22,51 @@ def get_forward_only_sentence(transcript: List[Dict], start_time: float, end_tim
             break
     return " ".join(context_segments).strip()
 
+class TranscriptIndex:
+    """
+    Prebuilt lookup structure over a transcript for repeated gap-context queries.
+
+    Holds the running maximum of segment end times (sorted, so it can be
+    bisected) and, for every segment, the index of the first segment at or
+    after it that closes a sentence. Each lookup is then O(log n) and returns
+    exactly what get_forward_only_sentence would.
+    """
+
+    def __init__(self, transcript: List[Dict]):
+        self.texts = [seg["text"] for seg in transcript]
+        self.end_times = np.maximum.accumulate(
+            np.array([seg["end"] for seg in transcript], dtype=np.float64)
+        ) if transcript else np.empty(0, dtype=np.float64)
+        self._ends = self.end_times.tolist()
+
+        n = len(self.texts)
+        self.sentence_end = [n - 1] * n
+        next_boundary = n - 1
+        for i in range(n - 1, -1, -1):
+            if ends_with_sentence(self.texts[i]):
+                next_boundary = i
+            self.sentence_end[i] = next_boundary
+
+    def _span_text(self, i: int) -> str:
+        if i >= len(self.texts):
+            return ""
+        return " ".join(self.texts[i:self.sentence_end[i] + 1]).strip()
+
+    def context_for(self, start_time: float, buffer: float = BUFFER) -> str:
+        return self._span_text(bisect_left(self._ends, start_time - buffer))
+
+    def contexts_for(self, start_times, buffer: float = BUFFER) -> List[str]:
+        starts = np.asarray(start_times, dtype=np.float64) - buffer
+        indices = np.searchsorted(self.end_times, starts, side="left")
+        return [self._span_text(int(i)) for i in indices]
+
 def extract_captions_for_gaps(transcript: List[Dict], gaps: List[Dict], buffer: float = BUFFER) -> List[Dict]:
-    enriched = []
-    for seg in gaps:
-        context = get_forward_only_sentence(transcript, seg["start"], seg["end"], buffer)
-        enriched.append({
-            "start": seg["start"],
-            "end": seg["end"],
-            "context": context
-        })
-    return enriched
+    index = TranscriptIndex(transcript)
+    contexts = index.contexts_for([seg["start"] for seg in gaps], buffer)
+    return [
+        {"start": seg["start"], "end": seg["end"], "context": context}
+        for seg, context in zip(gaps, contexts)
+    ]
 
 def save_captions(captions: List[Dict], path: str):
     os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -1,11 +1,10 @@
 import os
-import io
 import argparse
-import multiprocessing
-import numpy as np
-from rembg import remove
+import subprocess
 from PIL import Image
-from moviepy.editor import VideoFileClip, CompositeVideoClip, ColorClip, ImageClip
+
+from media_probe import probe_media
+from clip_enhance.video_editor.matting import get_matting_service
 
 # Platform-specific formatting settings
 PLATFORM_SETTINGS = {
@@ -26,8 +25,13 @@ PLATFORM_SETTINGS = {
     }
 }
 
-def resize_and_pad(clip: VideoFileClip, target_aspect: tuple[int, int]) -> CompositeVideoClip:
-    orig_w, orig_h = clip.size
+LOGO_SCALE = 0.12
+
+def padded_size(orig_w: int, orig_h: int, target_aspect: tuple[int, int]) -> tuple[int, int]:
+    """
+    Returns the canvas size that letterboxes (orig_w, orig_h) into target_aspect.
+    Dimensions are rounded down to even numbers as required by libx264/yuv420p.
+    """
     target_ratio = target_aspect[0] / target_aspect[1]
     orig_ratio = orig_w / orig_h
 
@@ -38,60 +42,124 @@ def resize_and_pad(clip: VideoFileClip, target_aspect: tuple[int, int]) -> Compo
         new_w = int(orig_h * target_ratio)
         new_h = orig_h
 
-    background = ColorClip(size=(new_w, new_h), color=(0, 0, 0), duration=clip.duration)
-    clip = clip.set_position(("center", "center"))
-    return CompositeVideoClip([background, clip])
+    return new_w - new_w % 2, new_h - new_h % 2
 
-def remove_logo_bg(logo_path: str) -> Image.Image:
-    with open(logo_path, "rb") as f:
-        input_bytes = f.read()
-    output_bytes = remove(input_bytes)
-    return Image.open(io.BytesIO(output_bytes)).convert("RGBA")
+def logo_offset(position: tuple, canvas: tuple[int, int], logo: tuple[int, int]) -> tuple[int, int]:
+    """
+    Resolves a moviepy-style ("left"|"center"|"right", "top"|"center"|"bottom") position to pixels.
+    """
+    horizontal, vertical = position
+    x = {"left": 0, "center": (canvas[0] - logo[0]) // 2, "right": canvas[0] - logo[0]}[horizontal]
+    y = {"top": 0, "center": (canvas[1] - logo[1]) // 2, "bottom": canvas[1] - logo[1]}[vertical]
+    return x, y
 
-def overlay_logo(clip: VideoFileClip, logo_path: str, position: str | tuple, scale: float = 0.12) -> CompositeVideoClip:
-    if not logo_path or not os.path.exists(logo_path):
-        print("⚠️ Logo path not provided or file does not exist.")
-        return clip
-
-    try:
-        logo_img = remove_logo_bg(logo_path)
-        logo_array = np.array(logo_img)
-
-        logo_clip = (
-            ImageClip(logo_array, ismask=False)
-            .set_duration(clip.duration)
-            .resize(height=int(clip.h * scale))
-            .set_position(position)
-        )
-        return CompositeVideoClip([clip, logo_clip])
-    except Exception as e:
-        print(f"⚠️ Failed to overlay logo: {e}")
-        return clip
-
-def process_for_platform(input_path: str, output_dir: str, platform: str, logo_path: str | None = None):
-    if platform not in PLATFORM_SETTINGS:
-        print(f"⚠️ Unsupported platform: {platform}")
-        return
+def remove_logo_bg(logo_path: str) -> Image.Image:
+    return get_matting_service().remove_background(logo_path)
 
-    settings = PLATFORM_SETTINGS[platform]
-    print(f"\n🎯 Formatting for {platform.title()}")
+def build_platform_graph(input_path: str, platforms: list[str], logo_path: str | None):
+    """
+    Builds the ffmpeg inputs and filter_complex that decode the source once,
+    split it per platform and apply pad / logo overlay on each branch.
 
-    clip = VideoFileClip(input_path)
-    formatted = resize_and_pad(clip, settings["aspect_ratio"])
+    Returns (input_args, filter_complex, output_labels).
+    """
+    media = probe_media(input_path)
+    orig_w, orig_h = media.size
 
+    use_logo = False
     if logo_path:
-        formatted = overlay_logo(formatted, logo_path, settings["logo_position"])
+        if os.path.exists(logo_path):
+            use_logo = True
+        else:
+            print("⚠️ Logo path not provided or file does not exist.")
+
+    input_args = ["-i", input_path]
+    filters = []
+    split_labels = "".join(f"[src{i}]" for i in range(len(platforms)))
+    filters.append(f"[0:v]split={len(platforms)}{split_labels}")
+
+    logo_inputs = {}
+    output_labels = []
+    for i, platform in enumerate(platforms):
+        settings = PLATFORM_SETTINGS[platform]
+        canvas_w, canvas_h = padded_size(orig_w, orig_h, settings["aspect_ratio"])
+        filters.append(
+            f"[src{i}]pad={canvas_w}:{canvas_h}:(ow-iw)/2:(oh-ih)/2:color=black,setsar=1[pad{i}]"
+        )
+        label = f"pad{i}"
+
+        if use_logo:
+            logo_h = max(1, int(canvas_h * LOGO_SCALE))
+            try:
+                logo_file, logo_size = get_matting_service().scaled_matte(logo_path, logo_h)
+            except Exception as e:
+                print(f"⚠️ Failed to overlay logo: {e}")
+                use_logo = False
+            else:
+                if logo_file not in logo_inputs:
+                    # Inputs are numbered after the source video (index 0).
+                    logo_inputs[logo_file] = len(logo_inputs) + 1
+                    input_args += ["-i", logo_file]
+                x, y = logo_offset(settings["logo_position"], (canvas_w, canvas_h), logo_size)
+                filters.append(f"[pad{i}][{logo_inputs[logo_file]}:v]overlay={x}:{y}:format=auto[out{i}]")
+                label = f"out{i}"
+
+        output_labels.append(label)
+
+    return input_args, ";".join(filters), output_labels
+
+def process_for_platforms(input_path: str, output_dir: str, platforms: list[str], logo_path: str | None = None) -> dict:
+    """
+    Formats one video for several platforms with a single ffmpeg run.
+
+    The source is decoded once and split into one branch per platform; every
+    branch is encoded to its own output inside the same process, so N platforms
+    cost one decode instead of N.
+
+    Returns a {platform: output_path} dict of rendered files.
+    """
+    supported = []
+    for platform in platforms:
+        if platform not in PLATFORM_SETTINGS:
+            print(f"⚠️ Unsupported platform: {platform}")
+        elif platform not in supported:
+            supported.append(platform)
+
+    if not supported:
+        return {}
+
+    print(f"\n🎯 Formatting for {', '.join(p.title() for p in supported)}")
 
     os.makedirs(output_dir, exist_ok=True)
     base_name = os.path.splitext(os.path.basename(input_path))[0]
-    output_path = os.path.join(output_dir, f"{base_name}_{platform}.mp4")
 
-    formatted.write_videofile(output_path, codec="libx264", audio_codec="aac", verbose=False, logger=None)
-    print(f"✅ Saved to: {output_path}")
+    input_args, filter_complex, output_labels = build_platform_graph(input_path, supported, logo_path)
+
+    cmd = ["ffmpeg", "-y", *input_args, "-filter_complex", filter_complex]
+    outputs = {}
+    for platform, label in zip(supported, output_labels):
+        output_path = os.path.join(output_dir, f"{base_name}_{platform}.mp4")
+        cmd += [
+            "-map", f"[{label}]", "-map", "0:a?",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac",
+            output_path
+        ]
+        outputs[platform] = output_path
+
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        # One filter graph serves every platform, so ffmpeg's own message is the only clue
+        stderr = e.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"❌ ffmpeg platform formatting failed for {input_path}:\n{stderr}") from e
+
+    for output_path in outputs.values():
+        print(f"✅ Saved to: {output_path}")
+    return outputs
 
-def run_process_for_platform(args_tuple):
-    input_path, output_dir, platform, logo_path = args_tuple
-    process_for_platform(input_path, output_dir, platform, logo_path)
+def process_for_platform(input_path: str, output_dir: str, platform: str, logo_path: str | None = None):
+    outputs = process_for_platforms(input_path, output_dir, [platform], logo_path)
+    return outputs.get(platform)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Format video for platforms like Instagram, YouTube, LinkedIn")
@@ -103,17 +171,5 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    # Prepare arguments for multiprocessing
-    jobs = [
-        (args.input, args.output, platform, args.logo)
-        for platform in args.platform
-    ]
-
-    processes = []
-    for job_args in jobs:
-        p = multiprocessing.Process(target=run_process_for_platform, args=(job_args,))
-        p.start()
-        processes.append(p)
-
-    for p in processes:
-        p.join()
+    # One ffmpeg process renders every platform from a single decode
+    process_for_platforms(args.input, args.output, args.platform, args.logo)
@@ -0,0 +1,92 @@
+import os
+import time
+import uuid
+import shutil
+
+# === Config ===
+WORKSPACE_ROOT = os.getenv("CLIP_ENHANCE_WORKSPACE_ROOT", os.path.join("temp", "sessions"))
+TMPFS_ROOT = "/dev/shm/clip_enhance"
+USE_TMPFS = os.getenv("CLIP_ENHANCE_TMPFS", "0") == "1"
+# What happens to a job's workspace when it exits:
+#   "always"          keep it
+#   "keep_on_failure" keep it only if the job raised (for debugging), delete it otherwise
+#   "never"           always delete it
+RETENTION = os.getenv("CLIP_ENHANCE_RETENTION", "keep_on_failure")
+MAX_AGE_HOURS = float(os.getenv("CLIP_ENHANCE_MAX_AGE_HOURS", "24"))
+
+RETENTION_POLICIES = {"always", "keep_on_failure", "never"}
+
+class SessionWorkspace:
+    """
+    Private scratch directory for one Clip Enhance job.
+
+    Every intermediate file (transcript, audio, scores, generated images,
+    alignment JSON) is resolved through the workspace, so concurrent jobs on
+    the same host never share a path. Use it as a context manager: on exit the
+    directory is removed according to the retention policy
+    ("always" keeps it, "keep_on_failure" keeps it only if the job raised,
+    "never" always removes it), and workspaces left behind by earlier runs
+    that are older than max_age_hours are pruned.
+    """
+
+    def __init__(self, session_id: str | None = None, use_tmpfs: bool = USE_TMPFS,
+                 retention: str = RETENTION, max_age_hours: float = MAX_AGE_HOURS):
+        if retention not in RETENTION_POLICIES:
+            raise ValueError(f"❌ Unknown retention policy: {retention}")
+
+        self.session_id = session_id or str(uuid.uuid4())
+        self.retention = retention
+        self.max_age_hours = max_age_hours
+
+        root = WORKSPACE_ROOT
+        if use_tmpfs:
+            if os.path.isdir(os.path.dirname(TMPFS_ROOT)):
+                root = TMPFS_ROOT
+            else:
+                print("⚠️ tmpfs not available, using disk workspace.")
+        self.root = root
+        self.path = os.path.join(root, self.session_id)
+
+        self.transcripts_dir = self.subdir("transcripts")
+        self.images_dir = self.subdir("images")
+
+    def subdir(self, name: str) -> str:
+        path = os.path.join(self.path, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def cleanup(self, failed: bool = False):
+        keep = self.retention == "always" or (self.retention == "keep_on_failure" and failed)
+        if keep:
+            print(f"📂 Workspace kept at: {self.path}")
+            return
+        shutil.rmtree(self.path, ignore_errors=True)
+        print("🧹 Temporary files cleaned up.")
+
+    def prune_stale(self):
+        """
+        Removes sibling workspaces older than max_age_hours (kept on failure or left by crashed jobs).
+        """
+        if not os.path.isdir(self.root):
+            return
+        cutoff = time.time() - self.max_age_hours * 3600
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if path == self.path or not os.path.isdir(path):
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        self.prune_stale()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup(failed=exc_type is not None)
+        return False
@@ -102,20 +102,20 @@ import os
 import argparse
 import uuid
 import json
-from moviepy.editor import VideoFileClip
+from media_probe import probe_media
 from clip_enhance.clip_enhance import main_short_clip_enhance
 from video_clipping.video_clipper import video_clipping_pipeline
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_video_duration(video_path: str) -> float:
+def get_media_info(video_path: str):
+    """The video's MediaInfo record, probed once and handed to every stage; None if unreadable."""
     try:
-        clip = VideoFileClip(video_path)
-        return clip.duration
+        return probe_media(video_path)
     except Exception as e:
         print(f"❌ Failed to load video: {e}")
-        return 0.0
+        return None
 
 def print_usage_guide():
     print("\n📖 USAGE GUIDE:")
@@ -150,7 +150,8 @@ def main():
     session_id = str(uuid.uuid4())
     print(f"🆔 Starting new processing session: {session_id}")
 
-    duration = get_video_duration(video_path)
+    media = get_media_info(video_path)
+    duration = media.duration if media else 0.0
     print(f"⏱️ Video duration: {duration:.2f} seconds")
 
     if duration < 200:
@@ -179,7 +180,8 @@ def main():
         video_clipping_pipeline(
             video_path=video_path,
             with_captions=args.captions,
-            session_id=session_id
+            session_id=session_id,
+            media=media
         )
 
         # Save session metadata only for long videos
@@ -0,0 +1,170 @@
+import os
+import json
+import threading
+import subprocess
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import List, Dict, Optional
+
+@dataclass(frozen=True)
+class AudioFormat:
+    codec: str
+    sample_rate: int
+    channels: int
+    channel_layout: Optional[str] = None
+
+@dataclass
+class MediaInfo:
+    """
+    Typed metadata for one media file, produced by a single ffprobe run.
+    """
+    path: str
+    duration: float
+    format_name: str
+    size_bytes: int
+    bit_rate: Optional[int]
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    video_codec: Optional[str] = None
+    audio: Optional[AudioFormat] = None
+    streams: List[Dict] = field(default_factory=list, repr=False)
+    _keyframes: Optional[List[float]] = field(default=None, repr=False)
+
+    @property
+    def has_video(self) -> bool:
+        return self.width is not None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio is not None
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """
+        (width, height) of the first video stream.
+        Raises ValueError for audio-only or unprobeable video.
+        """
+        if not self.width or not self.height:
+            raise ValueError(f"❌ No video stream with a known size in: {self.path}")
+        return self.width, self.height
+
+    def keyframes(self) -> List[float]:
+        """
+        Keyframe timestamps (seconds) of the first video stream.
+        Computed on first use only, since it requires reading packet headers.
+        """
+        if self._keyframes is None:
+            self._keyframes = _probe_keyframes(self.path) if self.has_video else []
+        return self._keyframes
+
+_cache: Dict[tuple, MediaInfo] = {}
+_lock = threading.Lock()
+
+def _parse_rate(rate: Optional[str]) -> Optional[float]:
+    if not rate or rate in ("0/0", "0"):
+        return None
+    try:
+        return float(Fraction(rate))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _run_ffprobe(path: str) -> Dict:
+    result = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-show_format", "-show_streams",
+        "-of", "json", path
+    ], check=True, capture_output=True, text=True)
+    return json.loads(result.stdout)
+
+def _probe_keyframes(path: str) -> List[float]:
+    result = subprocess.run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=print_section=0", path
+    ], check=True, capture_output=True, text=True)
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(float(pts_time))
+    return sorted(keyframes)
+
+def _build_info(path: str, data: Dict) -> MediaInfo:
+    fmt = data.get("format", {})
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"
+                  and not s.get("disposition", {}).get("attached_pic")), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    duration = float(fmt.get("duration") or 0.0)
+    if not duration:
+        duration = max((float(s.get("duration") or 0.0) for s in streams), default=0.0)
+
+    info = MediaInfo(
+        path=path,
+        duration=duration,
+        format_name=fmt.get("format_name", ""),
+        size_bytes=_to_int(fmt.get("size")) or 0,
+        bit_rate=_to_int(fmt.get("bit_rate")),
+        streams=streams,
+    )
+
+    if video:
+        info.width = _to_int(video.get("width"))
+        info.height = _to_int(video.get("height"))
+        info.fps = _parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate"))
+        info.video_codec = video.get("codec_name")
+
+    if audio:
+        info.audio = AudioFormat(
+            codec=audio.get("codec_name", ""),
+            sample_rate=_to_int(audio.get("sample_rate")) or 0,
+            channels=_to_int(audio.get("channels")) or 0,
+            channel_layout=audio.get("channel_layout"),
+        )
+
+    return info
+
+def probe_media(path: str) -> MediaInfo:
+    """
+    Runs ffprobe once per file and memoizes the result for the rest of the process.
+    The cache key includes size and mtime, so a rewritten file is probed again.
+
+    Raises RuntimeError if the file cannot be probed.
+    """
+    real_path = os.path.realpath(path)
+    stat = os.stat(real_path)
+    key = (real_path, stat.st_size, stat.st_mtime_ns)
+
+    with _lock:
+        info = _cache.get(key)
+    if info is not None:
+        return info
+
+    try:
+        data = _run_ffprobe(real_path)
+    except (subprocess.CalledProcessError, json.JSONDecodeError) as e:
+        raise RuntimeError(f"❌ Failed to probe media: {path} | {e}") from e
+
+    info = _build_info(path, data)
+    with _lock:
+        _cache[key] = info
+    return info
+
+# === CLI testing entry ===
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("Usage: python media_probe.py <media_path>")
+    else:
+        media = probe_media(sys.argv[1])
+        print(media)
+        if "--keyframes" in sys.argv:
+            print(f"🔑 {len(media.keyframes())} keyframes")
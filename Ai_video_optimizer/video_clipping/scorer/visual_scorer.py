@@ -6,6 +6,7 @@ import numpy as np
 from PIL import Image
 from tqdm import tqdm
 from moviepy.editor import VideoFileClip
+from media_probe import probe_media
 
 device = "cuda" if torch.cuda.is_available() else "cpu"
 
@@ -16,7 +17,7 @@ def load_clip_model():
 model, preprocess = load_clip_model()
 
 
-def extract_frame_embeddings(video_path, scenes, frames_dir="frames"):
+def extract_frame_embeddings(video_path, scenes, frames_dir="frames", media=None):
     """
     Extract CLIP image embeddings from video frames in each scene.
     Score scenes by visual variance (higher = more visually dynamic).
@@ -25,6 +26,7 @@ def extract_frame_embeddings(video_path, scenes, frames_dir="frames"):
         video_path (str): Path to input video.
         scenes (list): List of (start, end) scene timestamps in seconds.
         frames_dir (str): Directory to save temp frames (optional).
+        media (MediaInfo): Probe record of the video; probed here if not given.
 
     Returns:
         cleaned_scenes: Top-N (start, end) scene tuples.
@@ -67,7 +69,8 @@ def extract_frame_embeddings(video_path, scenes, frames_dir="frames"):
     sorted_scenes = sorted(scene_scores, key=lambda s: s["score"], reverse=True)
 
     # Dynamic top_k based on video duration
-    total_duration = video.duration or 1
+    media = media or probe_media(video_path)
+    total_duration = media.duration or 1
     top_k = max(3, int(total_duration / 120))  # 1 per 2 mins, minimum 3
 
     top_scenes = sorted_scenes[:top_k] if len(sorted_scenes) >= top_k else sorted_scenes
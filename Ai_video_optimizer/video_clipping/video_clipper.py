@@ -53,14 +53,16 @@ import sys
 import argparse
 import concurrent.futures
 
+from media_probe import probe_media
 from video_clipping.transcripts.transcriber import transcribe_video
 from video_clipping.scene_detector.scene_detector import detect_scenes
 from video_clipping.scorer.visual_scorer import extract_frame_embeddings
 from video_clipping.video_editor.clip_exporter import export_top_scenes
 from video_clipping.scorer.context_scorer import score_transcript, map_context_scores_to_scenes
 
-def video_clipping_pipeline(video_path, with_captions=False, session_id=None):
+def video_clipping_pipeline(video_path, with_captions=False, session_id=None, media=None):
     print(f"\n🎥 Starting highlight clipping pipeline for: {video_path}")
+    media = media or probe_media(video_path)
     if session_id:
         print(f"🔑 Session ID: {session_id}")
 
@@ -75,7 +77,7 @@ def video_clipping_pipeline(video_path, with_captions=False, session_id=None):
     print("⚡ Scoring context and visual diversity in parallel...")
     with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
         future_context = executor.submit(score_transcript, transcript)
-        future_visual = executor.submit(extract_frame_embeddings, video_path, scenes)
+        future_visual = executor.submit(extract_frame_embeddings, video_path, scenes, media=media)
 
         context_scores = future_context.result()
         cleaned_scenes, visual_scores = future_visual.result()
@@ -86,7 +88,8 @@ def video_clipping_pipeline(video_path, with_captions=False, session_id=None):
     )
 
     print("✂️ Exporting top video clips...")
-    exported = export_top_scenes(video_path, scored_scenes, with_captions=with_captions, session_id=session_id)
+    exported = export_top_scenes(video_path, scored_scenes, with_captions=with_captions,
+                                 session_id=session_id, media=media)
 
     print("\n✅ DONE — Exported Clips:")
     for path in exported:
@@ -1,31 +1,43 @@
 import os
 import json
 from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip
+from media_probe import probe_media
+from word_index import WordIndex
 
 
 def load_transcript(video_path):
+    """
+    Returns the video's transcript segments as a memory-mapped WordIndex.
+
+    The columnar `.idx` file is built from the transcriber's JSON the first
+    time (or when the JSON is newer), so later exports skip the JSON parse.
+    """
     base_name = os.path.splitext(os.path.basename(video_path))[0]
     transcript_path = os.path.join("transcripts", f"{base_name}.json")
-    if os.path.exists(transcript_path):
+    index_path = os.path.join("transcripts", f"{base_name}.idx")
+    if not os.path.exists(transcript_path):
+        return None
+
+    if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(transcript_path):
         with open(transcript_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+            WordIndex.from_words(json.load(f), key="text").save(index_path)
+    return WordIndex.load(index_path)
 
 
 def overlay_captions_on_clip(clip, transcript, clip_start, clip_end):
     caption_clips = []
-    for entry in transcript:
-        if clip_start <= entry["start"] <= clip_end:
-            start_time = entry["start"] - clip_start
-            end_time = min(entry["end"], clip_end) - clip_start
-            caption = (
-                TextClip(entry["text"], fontsize=24, color='white', bg_color='black')
-                .set_position(("center", "bottom"))
-                .set_start(start_time)
-                .set_duration(end_time - start_time)
-                .resize(width=clip.w * 0.9)
-            )
-            caption_clips.append(caption)
+    # Only the segments starting inside the clip, found by bisecting the start column
+    for entry in transcript.entries(clip_start, clip_end, key="text"):
+        start_time = entry["start"] - clip_start
+        end_time = min(entry["end"], clip_end) - clip_start
+        caption = (
+            TextClip(entry["text"], fontsize=24, color='white', bg_color='black')
+            .set_position(("center", "bottom"))
+            .set_start(start_time)
+            .set_duration(end_time - start_time)
+            .resize(width=clip.w * 0.9)
+        )
+        caption_clips.append(caption)
 
     if caption_clips:
         return CompositeVideoClip([clip, *caption_clips])
@@ -40,13 +52,15 @@ def export_top_scenes(
     max_len=35.0,
     pre_buffer=2.0,
     with_captions=False,
-    session_id=None  # New parameter
+    session_id=None,  # New parameter
+    media=None  # MediaInfo of the video; probed here if not given
 ):
     os.makedirs(output_dir, exist_ok=True)
+    media = media or probe_media(video_path)
     video = VideoFileClip(video_path)
-    video_duration = video.duration
+    video_duration = media.duration
 
-    transcript = load_transcript(video_path) if with_captions else []
+    transcript = load_transcript(video_path) if with_captions else None
 
     # Sort scenes by score
     sorted_scenes = sorted(scored_scenes, key=lambda x: x["score"], reverse=True)
@@ -142,18 +156,18 @@ if __name__ == "__main__":
     with_captions = "--captions" in sys.argv
 
     scenes = detect_scenes(video_path)
-    cleaned_scenes, visual_scores = extract_frame_embeddings(video_path, scenes)
+    media = probe_media(video_path)
+    cleaned_scenes, visual_scores = extract_frame_embeddings(video_path, scenes, media=media)
 
     scored = [
         {"start": s[0], "end": s[1], "score": visual_scores[i]}
         for i, s in enumerate(cleaned_scenes)
     ]
 
-    video = VideoFileClip(video_path)
-    top_k = max(3, int(video.duration // 30))
+    top_k = max(3, int(media.duration // 30))
 
     exported = export_top_scenes(
-        video_path, scored, top_k=top_k, with_captions=with_captions
+        video_path, scored, top_k=top_k, with_captions=with_captions, media=media
     )
 
     print("\n🎉 Exported Clips:")
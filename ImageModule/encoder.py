@@ -0,0 +1,130 @@
+"""
+Size-budgeted image encoder.
+
+Encodes rendered images to a byte budget per platform instead of a fixed
+quality: the highest quality that fits the budget is found by binary search
+over in-memory encodes, using the most efficient codec the platform accepts
+(AVIF, WebP, then JPEG) that this Pillow build can write.
+"""
+
+import io
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, features
+
+# Byte budget and accepted codecs (in order of preference) per platform
+PLATFORM_ENCODING = {
+    "instagram": {"budget_kb": 800, "formats": ["JPG"]},
+    "facebook": {"budget_kb": 600, "formats": ["WEBP", "JPG"]},
+    "x.com": {"budget_kb": 900, "formats": ["WEBP", "JPG"]},
+    "linkedin": {"budget_kb": 800, "formats": ["JPG"]},
+    "pinterest": {"budget_kb": 800, "formats": ["WEBP", "JPG"]},
+}
+# Used when the destination is not a known platform (e.g. web embeds, the standalone CLI)
+DEFAULT_ENCODING = {"budget_kb": 500, "formats": ["AVIF", "WEBP", "JPG"]}
+
+QUALITY_RANGE = (40, 95)
+
+CODECS = {
+    "JPG": {"pil_format": "JPEG", "ext": "jpg", "options": {"optimize": True, "progressive": True}},
+    "WEBP": {"pil_format": "WEBP", "ext": "webp", "options": {"method": 4}},
+    "AVIF": {"pil_format": "AVIF", "ext": "avif", "options": {"speed": 8}},
+}
+
+
+def supported_formats() -> List[str]:
+    """Codecs this Pillow build can encode"""
+    checks = {"JPG": "jpg", "WEBP": "webp", "AVIF": "avif"}
+    return [fmt for fmt, feature in checks.items() if features.check(feature)]
+
+
+def get_encoding(platform: Optional[str]) -> Dict:
+    return PLATFORM_ENCODING.get((platform or "").lower(), DEFAULT_ENCODING)
+
+
+def choose_format(formats: List[str]) -> str:
+    """First codec in `formats` that can be encoded here (JPEG is always available)"""
+    available = supported_formats()
+    return next((fmt for fmt in formats if fmt in available), "JPG")
+
+
+def _prepare(image: Image.Image, fmt: str) -> Image.Image:
+    if fmt == "JPG" and image.mode in ("RGBA", "LA", "P"):
+        # JPEG has no alpha: flatten onto white like the JPG output path does
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    if image.mode not in ("RGB", "RGBA"):
+        return image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    return image
+
+
+def _encode(image: Image.Image, fmt: str, quality: int, dpi: int) -> bytes:
+    codec = CODECS[fmt]
+    buffer = io.BytesIO()
+    image.save(buffer, format=codec["pil_format"], quality=quality, dpi=(dpi, dpi), **codec["options"])
+    return buffer.getvalue()
+
+
+def encode_to_budget(image: Image.Image, fmt: str, budget_bytes: int, dpi: int = 72,
+                     quality_range: Tuple[int, int] = QUALITY_RANGE) -> Tuple[bytes, int]:
+    """
+    Encode at the highest quality whose output fits in `budget_bytes`.
+
+    Returns:
+        tuple: (encoded bytes, quality used); the lowest quality if nothing fits
+    """
+    image = _prepare(image, fmt)
+    low, high = quality_range
+
+    # Most renders fit at full quality; only search when they do not
+    data = _encode(image, fmt, high, dpi)
+    if len(data) <= budget_bytes:
+        return data, high
+    high -= 1
+
+    best = None
+    while low <= high:
+        quality = (low + high) // 2
+        data = _encode(image, fmt, quality, dpi)
+        if len(data) <= budget_bytes:
+            best = (data, quality)
+            low = quality + 1
+        else:
+            high = quality - 1
+
+    if best is None:
+        quality = quality_range[0]
+        return _encode(image, fmt, quality, dpi), quality
+    return best
+
+
+def save_for_platform(image: Image.Image, output_stem: str, platform: Optional[str] = None,
+                      dpi: int = 72) -> Dict:
+    """
+    Encode `image` for `platform` within its byte budget and write it next to
+    `output_stem` with the chosen codec's extension.
+
+    Returns:
+        dict: {"path", "format", "quality", "bytes", "budget_bytes"}
+    """
+    encoding = get_encoding(platform)
+    fmt = choose_format(encoding["formats"])
+    budget_bytes = encoding["budget_kb"] * 1024
+
+    data, quality = encode_to_budget(image, fmt, budget_bytes, dpi)
+    output_path = Path(f"{output_stem}.{CODECS[fmt]['ext']}")
+    output_path.write_bytes(data)
+
+    if len(data) > budget_bytes:
+        print(f"⚠️ {output_path.name}: {len(data) / 1024:.0f} KB exceeds the {encoding['budget_kb']} KB budget at minimum quality")
+    return {
+        "path": str(output_path),
+        "format": fmt,
+        "quality": quality,
+        "bytes": len(data),
+        "budget_bytes": budget_bytes,
+    }
+
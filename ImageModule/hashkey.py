@@ -3,18 +3,96 @@ import sys
 import argparse
 import logging
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from openai import OpenAI
 from urllib.parse import quote
 import json
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import re
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Scraped hashtags are cached per niche on disk; popular niches are requested constantly
+HASHTAG_CACHE_DIR = os.getenv("HASHTAG_CACHE_DIR", os.path.join("cache", "hashtags"))
+HASHTAG_CACHE_TTL = int(os.getenv("HASHTAG_CACHE_TTL", 24 * 3600))  # seconds
+SCRAPE_TIMEOUT = (3.05, 8)          # (connect, read) per source
+SCRAPE_MAX_BYTES = 2 * 1024 * 1024  # Hashtag pages are small; never read more than this
+
+SCRAPE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# Markup that can contain '#' but never visible hashtags (CSS colors, scripts, href fragments)
+_NON_TEXT_PATTERN = re.compile(r'<(script|style)\b.*?</\1\s*>|<[^>]*>', re.IGNORECASE | re.DOTALL)
+# '#tag' not preceded by '&' or a word character, so '&#39;' entities and 'a#b' are skipped
+_HASHTAG_PATTERN = re.compile(r'(?<![&\w])#(\w+)')
+
+_scrape_session = requests.Session()
+_scrape_session.headers.update(SCRAPE_HEADERS)
+_scrape_session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+_scrape_executor = ThreadPoolExecutor(max_workers=12, thread_name_prefix="hashtag-scrape")
+
+
+def extract_hashtags(html):
+    """Hashtags visible in an HTML page, in order of first appearance, without duplicates"""
+    text = _NON_TEXT_PATTERN.sub(' ', html)
+    return list(dict.fromkeys(f"#{tag}" for tag in _HASHTAG_PATTERN.findall(text)))
+
+
+def _fetch_hashtags(url, stop):
+    """Stream one source and extract its hashtags; gives up early once `stop` is set"""
+    with _scrape_session.get(url, timeout=SCRAPE_TIMEOUT, stream=True) as response:
+        if response.status_code != 200:
+            return []
+        chunks, size = [], 0
+        for chunk in response.iter_content(chunk_size=16384):
+            if stop.is_set():
+                return []
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= SCRAPE_MAX_BYTES:
+                break
+        html = b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+    return extract_hashtags(html)
+
+
+def _cache_path(niche):
+    safe = re.sub(r'[^a-z0-9-]+', '_', niche.lower()).strip('_') or "niche"
+    digest = hashlib.sha256(niche.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(HASHTAG_CACHE_DIR, f"{safe}_{digest}.json")
+
+
+def read_cached_hashtags(niche, ttl=HASHTAG_CACHE_TTL):
+    """Cached hashtag text for `niche`, or None if missing or older than `ttl` seconds"""
+    try:
+        with open(_cache_path(niche), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if time.time() - entry.get("fetched_at", 0) > ttl:
+        return None
+    return entry.get("hashtag_text")
+
+
+def write_cached_hashtags(niche, hashtag_text, source):
+    path = _cache_path(niche)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"niche": niche, "source": source, "fetched_at": time.time(),
+                   "hashtag_text": hashtag_text}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
 SUPPORTED_PLATFORMS = {
     "instagram": (15, 30),
     "tiktok": (3, 6),
@@ -39,6 +117,10 @@ class ArticleNicheHashtagAnalyzer:
             )
         
         self.client = OpenAI(api_key=api_key)
+        
+        # Niches and scraped hashtag text per content hash, shared by every platform
+        self._pools = {}
+        self._pools_lock = threading.Lock()
 
     def read_article(self, filepath):
         """Read article content from file"""
@@ -141,50 +223,70 @@ class ArticleNicheHashtagAnalyzer:
         return hashtag_sites
 
     def scrape_hashtags_from_multiple_sources(self, niche):
-        """Scrape hashtags from multiple sources for better coverage"""
+        """
+        Scrape hashtags from multiple sources for better coverage
+        
+        All sources are requested concurrently on a pooled session; the first
+        one that yields hashtags wins and the others are cancelled. Scraped
+        and AI-generated results are cached per niche for HASHTAG_CACHE_TTL.
+        """
         logger.info(f"📋 Searching hashtags for niche: {niche}")
         
+        cached = read_cached_hashtags(niche)
+        if cached:
+            logger.info(f"♻️ Using cached hashtags for: {niche}")
+            return cached
+        
         all_hashtag_text = ""
         
-        # Method 1: Try hashtag websites
+        # Method 1: Race the hashtag websites
         hashtag_urls = self.search_best_hashtag_url(niche)
-        
-        for url in hashtag_urls:
-            try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.5',
-                    'Accept-Encoding': 'gzip, deflate',
-                    'Connection': 'keep-alive',
-                }
+        stop = threading.Event()
+        futures = {_scrape_executor.submit(_fetch_hashtags, url, stop): url for url in hashtag_urls}
+        try:
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    hashtags = future.result()
+                except Exception as e:
+                    logger.debug(f"Failed to scrape {url}: {e}")
+                    continue
                 
-                response = requests.get(url, timeout=10, headers=headers)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    
-                    # Look for hashtag patterns in the text
-                    text_content = soup.get_text()
-                    hashtags = re.findall(r'#\w+', text_content)
-                    
-                    if hashtags:
-                        all_hashtag_text += " ".join(hashtags) + " "
-                        logger.info(f"✅ Found hashtags from: {url}")
-                        break  # If we found hashtags, no need to try other URLs
-                    
-            except Exception as e:
-                logger.debug(f"Failed to scrape {url}: {e}")
-                continue
+                if hashtags:
+                    all_hashtag_text = " ".join(hashtags) + " "
+                    logger.info(f"✅ Found hashtags from: {url}")
+                    source = url
+                    break  # First good source wins
+        finally:
+            # Stop the slower sources: queued ones never start, running ones stop reading
+            stop.set()
+            for future in futures:
+                future.cancel()
         
         # Method 2: Generate hashtags using AI if scraping failed
         if not all_hashtag_text.strip():
             logger.info(f"🤖 Generating hashtags for '{niche}' using AI...")
-            all_hashtag_text = self.generate_hashtags_with_ai(niche)
+            all_hashtag_text = self.generate_hashtags_with_ai(niche, fallback=False)
+            source = "ai"
+            if all_hashtag_text is None:
+                # Transient API failure: serve the generic tags but don't cache them
+                return self.basic_hashtags(niche)
         
+        if all_hashtag_text.strip():
+            write_cached_hashtags(niche, all_hashtag_text, source)
         return all_hashtag_text
 
-    def generate_hashtags_with_ai(self, niche):
-        """Generate relevant hashtags using AI when scraping fails"""
+    def basic_hashtags(self, niche):
+        """Generic last-resort hashtags; never cached"""
+        tag = niche.replace('-', '').replace('_', '')
+        return " ".join([f"#{tag}", f"#{tag}life", "#trending", "#viral", "#content", "#social", "#engagement"])
+
+    def generate_hashtags_with_ai(self, niche, fallback=True):
+        """
+        Generate relevant hashtags using AI when scraping fails
+        
+        On an API error returns basic_hashtags(niche), or None if `fallback` is False.
+        """
         prompt = f"""
         Generate 20-30 relevant and popular hashtags for the niche: "{niche}"
         
@@ -217,12 +319,7 @@ class ArticleNicheHashtagAnalyzer:
         except Exception as e:
             logger.error(f"Error generating hashtags with AI: {e}")
             # Fallback to basic hashtags
-            basic_hashtags = [
-                f"#{niche.replace('-', '').replace('_', '')}",
-                f"#{niche.replace('-', '').replace('_', '')}life",
-                "#trending", "#viral", "#content", "#social", "#engagement"
-            ]
-            return " ".join(basic_hashtags)
+            return self.basic_hashtags(niche) if fallback else None
 
     def analyze_hashtags(self, hashtag_text, platform):
         """Analyze and select optimal hashtags for the platform with improved logic"""
@@ -331,23 +428,19 @@ class ArticleNicheHashtagAnalyzer:
             "content", "social", "trending", "community", "engagement"
         ])
 
-    def process(self, filepath, platform):
-        """Main processing function with improved hashtag retrieval"""
-        logger.info("🚀 Starting hashtag analysis...")
+    def collect_hashtag_pool(self, text):
+        """
+        Find the niches of `text` and collect hashtag text for each of them
         
-        # Step 1: Read article
-        logger.info("📖 Reading article...")
-        text = self.read_article(filepath)
-        if not text:
-            logger.error("Failed to read article content")
-            return
-
-        # Step 2: Find niches with improved extraction
+        Returns:
+            tuple: (niches, combined hashtag text)
+        """
+        # Find niches with improved extraction
         logger.info("🎯 Identifying niches...")
         niches = self.get_niches(text)
         logger.info(f"✅ Identified niches: {niches}")
 
-        # Step 3: Collect hashtags for each niche using multiple methods
+        # Collect hashtags for each niche using multiple methods
         logger.info("🔄 Collecting hashtags from multiple sources...")
         
         all_hashtag_text = ""
@@ -373,13 +466,51 @@ class ArticleNicheHashtagAnalyzer:
                 except Exception as e:
                     logger.error(f"❌ Failed hashtag collection for {niche}: {e}")
 
-        # Step 4: If no hashtags found, generate them using AI
+        # If no hashtags found, generate them using AI
         if not all_hashtag_text.strip():
             logger.info("🤖 No hashtags scraped, generating with AI...")
             for niche in niches:
                 ai_hashtags = self.generate_hashtags_with_ai(niche)
                 all_hashtag_text += ai_hashtags + "\n"
 
+        return niches, all_hashtag_text
+
+    def get_hashtag_pool(self, text):
+        """
+        Memoized collect_hashtag_pool: niches and scraping run once per text,
+        however many platforms ask for it. Concurrent callers with the same
+        text wait for the first one instead of repeating the work.
+        """
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._pools_lock:
+            future = self._pools.get(key)
+            owner = future is None
+            if owner:
+                future = self._pools[key] = Future()
+
+        if owner:
+            try:
+                future.set_result(self.collect_hashtag_pool(text))
+            except Exception as e:
+                with self._pools_lock:
+                    self._pools.pop(key, None)  # Let a later call retry
+                future.set_exception(e)
+        return future.result()
+
+    def process(self, filepath, platform):
+        """Main processing function with improved hashtag retrieval"""
+        logger.info("🚀 Starting hashtag analysis...")
+        
+        # Step 1: Read article
+        logger.info("📖 Reading article...")
+        text = self.read_article(filepath)
+        if not text:
+            logger.error("Failed to read article content")
+            return
+
+        # Steps 2-4: Niches and hashtag collection (shared with other platforms for the same text)
+        niches, all_hashtag_text = self.get_hashtag_pool(text)
+
         # Step 5: Analyze and select optimal hashtags
         logger.info("🧠 Analyzing optimal hashtags...")
         best_hashtags = self.analyze_hashtags(all_hashtag_text, platform)
@@ -4,6 +4,9 @@ from PIL import Image, ImageEnhance
 import argparse
 from pathlib import Path
 import math
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import encoder
 
 class SocialMediaImageOptimizer:
     """Advanced image optimizer for social media platforms"""
@@ -21,6 +24,13 @@ class SocialMediaImageOptimizer:
             'portrait': (1080, 1350)    # Instagram portrait
         }
         
+        # Largest size worth uploading; platforms recompress anything bigger
+        self.max_dimensions = {
+            'landscape': (2048, 1072),
+            'square': (1440, 1440),
+            'portrait': (1440, 1800)
+        }
+        
         self.target_dpi = 72  # Web standard
         
     def get_crop_box_smart(self, img_width, img_height, target_ratio):
@@ -55,8 +65,42 @@ class SocialMediaImageOptimizer:
         return image
     
     def resize_with_quality(self, image, target_size):
-        """Resize image maintaining quality using Lanczos resampling"""
-        return image.resize(target_size, Image.Resampling.LANCZOS)
+        """
+        Resize image maintaining quality using Lanczos resampling
+        
+        Large downscales first shrink by an integer factor with reduce()
+        (box averaging) and only run Lanczos over the last <3x, which is
+        much cheaper and visually indistinguishable.
+        """
+        if image.size == tuple(target_size):
+            return image
+        return image.resize(target_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    
+    def get_target_size(self, width, height, target_format):
+        """Final size for a crop: upscaled to the minimum dimensions, or capped at the maximum"""
+        min_dims = self.min_dimensions[target_format]
+        max_dims = self.max_dimensions[target_format]
+        
+        scale_factor = max(min_dims[0] / width, min_dims[1] / height)
+        if scale_factor <= 1:
+            scale_factor = min(1.0, max_dims[0] / width, max_dims[1] / height)
+        if scale_factor == 1:
+            return width, height
+        return int(width * scale_factor), int(height * scale_factor)
+    
+    def get_decode_size(self, img_width, img_height, target_formats):
+        """
+        Smallest decoded size from which every target format can still be
+        rendered at its final size (used to pick a JPEG draft scale)
+        """
+        scale = 0.0
+        for target_format in target_formats:
+            crop_box = self.get_crop_box_smart(img_width, img_height, self.aspect_ratios[target_format])
+            crop_width = crop_box[2] - crop_box[0]
+            final_width, _ = self.get_target_size(crop_width, crop_box[3] - crop_box[1], target_format)
+            scale = max(scale, final_width / crop_width)
+        scale = min(scale, 1.0)
+        return math.ceil(img_width * scale), math.ceil(img_height * scale)
     
     def detect_best_aspect_ratio(self, img_width, img_height):
         """
@@ -107,8 +151,144 @@ class SocialMediaImageOptimizer:
             # Use the calculated best match
             return best_format
     
+    def load_source(self, input_path, output_format='PNG', target_formats=('auto',)):
+        """
+        Decode an image once and convert it to the mode the output format needs
+        (RGBA composited onto white for JPG, RGBA kept for PNG, RGB otherwise).
+        The returned image is fully loaded, so it can be shared read-only
+        between threads.
+        
+        'auto' formats are resolved from the header size before decoding, so
+        JPEGs can be decoded with draft() directly at a reduced DCT scale
+        (1/2, 1/4 or 1/8) that is still large enough for every target.
+        
+        Returns:
+            tuple: (image, target formats with 'auto' resolved)
+        """
+        with Image.open(input_path) as img:
+            original_size = img.size
+            if 'auto' in target_formats:
+                detected = self.detect_best_aspect_ratio(img.width, img.height)
+                print(f"Auto-detected format: {detected}")
+                target_formats = [detected if fmt == 'auto' else fmt for fmt in target_formats]
+            
+            if img.format == 'JPEG':
+                decode_size = self.get_decode_size(img.width, img.height, target_formats)
+                if decode_size != img.size:
+                    img.draft(img.mode, decode_size)
+            print(f"Original size: {original_size[0]}x{original_size[1]}"
+                  + (f" (decoded at {img.width}x{img.height})" if img.size != original_size else ""))
+            
+            # Convert to RGB if necessary
+            if img.mode in ('RGBA', 'LA', 'P'):
+                if output_format.upper() == 'JPG':
+                    # Create white background for JPG
+                    background = Image.new('RGB', img.size, (255, 255, 255))
+                    if img.mode == 'P':
+                        img = img.convert('RGBA')
+                    background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+                    img = background
+                else:
+                    img = img.convert('RGBA')
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
+            img.load()
+            return img, list(target_formats)
+
+    def render(self, img, target_format, enhance_quality=True):
+        """
+        Crop and resize a decoded image to one target format.
+
+        Returns:
+            tuple: (rendered image, resolved target format)
+        """
+        original_size = img.size
+
+        # Auto-detect best format if requested
+        if target_format == 'auto':
+            target_format = self.detect_best_aspect_ratio(img.width, img.height)
+            print(f"Auto-detected format: {target_format}")
+
+        # Get target aspect ratio
+        target_ratio = self.aspect_ratios[target_format]
+
+        # Smart crop to target aspect ratio
+        crop_box = self.get_crop_box_smart(img.width, img.height, target_ratio)
+        cropped_img = img.crop(crop_box)
+
+        crop_loss = (1 - (crop_box[2] - crop_box[0]) * (crop_box[3] - crop_box[1]) /
+                   (original_size[0] * original_size[1])) * 100
+        print(f"Cropping loss: {crop_loss:.1f}%")
+
+        # Calculate final dimensions: minimum dimensions met, oversized crops capped
+        current_width, current_height = cropped_img.size
+        final_width, final_height = self.get_target_size(current_width, current_height, target_format)
+        if final_width > current_width:
+            print(f"Upscaling by factor: {final_width / current_width:.2f}")
+        elif final_width < current_width:
+            print(f"Downscaling by factor: {current_width / final_width:.2f}")
+
+        # Resize image
+        final_img = self.resize_with_quality(cropped_img, (final_width, final_height))
+
+        # Enhance quality if requested (only ever at the target size)
+        if enhance_quality:
+            final_img = self.enhance_image_quality(final_img)
+
+        return final_img, target_format
+
+    def save(self, final_img, input_path, output_dir, target_format, output_format='PNG', platform=None):
+        """
+        Save a rendered image as <input stem>_<target_format>.<ext> in output_dir.
+        
+        output_format 'AUTO' encodes to the platform's byte budget with the best
+        codec it accepts (see encoder.py); 'PNG' and 'JPG' save as before.
+        """
+        input_name = Path(input_path).stem
+        target_ratio = self.aspect_ratios[target_format]
+        
+        if output_format.upper() == 'AUTO':
+            encoded = encoder.save_for_platform(
+                final_img, str(Path(output_dir) / f"{input_name}_{target_format}"), platform, self.target_dpi
+            )
+            print(f"✓ Processed: {Path(encoded['path']).name}")
+            print(f"  Final size: {final_img.width}x{final_img.height}")
+            print(f"  Format: {encoded['format']} q{encoded['quality']}, "
+                  f"{encoded['bytes'] / 1024:.0f} KB of {encoded['budget_bytes'] / 1024:.0f} KB budget")
+            print(f"  Aspect ratio: {target_ratio[0]}:{target_ratio[1]}")
+            print(f"  File saved: {encoded['path']}")
+            return encoded['path']
+        
+        output_filename = f"{input_name}_{target_format}.{output_format.lower()}"
+        output_path = Path(output_dir) / output_filename
+
+        # Save with appropriate quality settings
+        save_kwargs = {'dpi': (self.target_dpi, self.target_dpi)}
+
+        if output_format.upper() == 'JPG':
+            save_kwargs.update({
+                'quality': 95,
+                'optimize': True,
+                'progressive': True
+            })
+        elif output_format.upper() == 'PNG':
+            save_kwargs.update({
+                'optimize': True,
+                'compress_level': 6
+            })
+
+        final_img.save(output_path, **save_kwargs)
+
+        print(f"✓ Processed: {output_filename}")
+        print(f"  Final size: {final_img.width}x{final_img.height}")
+        print(f"  Format: {output_format}")
+        print(f"  Aspect ratio: {target_ratio[0]}:{target_ratio[1]}")
+        print(f"  File saved: {output_path}")
+
+        return str(output_path)
+
     def process_image(self, input_path, output_dir, target_format='auto', 
-                     output_format='PNG', enhance_quality=True):
+                     output_format='PNG', enhance_quality=True, platform=None):
         """
         Process a single image for social media optimization
         
@@ -116,110 +296,95 @@ class SocialMediaImageOptimizer:
             input_path: Path to input image
             output_dir: Directory to save processed image  
             target_format: 'auto', 'landscape', 'square', or 'portrait'
-            output_format: 'PNG' or 'JPG'
+            output_format: 'PNG', 'JPG' or 'AUTO' (size-budgeted, see encoder.py)
             enhance_quality: Whether to apply quality enhancements
+            platform: Platform whose byte budget and codecs 'AUTO' should use
         """
         try:
-            # Open and validate image
-            with Image.open(input_path) as img:
-                # Convert to RGB if necessary
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    if output_format.upper() == 'JPG':
-                        # Create white background for JPG
-                        background = Image.new('RGB', img.size, (255, 255, 255))
-                        if img.mode == 'P':
-                            img = img.convert('RGBA')
-                        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                        img = background
-                    else:
-                        img = img.convert('RGBA')
-                elif img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                original_size = img.size
-                print(f"Original size: {original_size[0]}x{original_size[1]}")
-                
-                # Auto-detect best format if requested
-                if target_format == 'auto':
-                    target_format = self.detect_best_aspect_ratio(img.width, img.height)
-                    print(f"Auto-detected format: {target_format}")
-                
-                # Get target aspect ratio and minimum dimensions
-                target_ratio = self.aspect_ratios[target_format]
-                min_dims = self.min_dimensions[target_format]
-                
-                # Smart crop to target aspect ratio
-                crop_box = self.get_crop_box_smart(img.width, img.height, target_ratio)
-                cropped_img = img.crop(crop_box)
-                
-                crop_loss = (1 - (crop_box[2] - crop_box[0]) * (crop_box[3] - crop_box[1]) / 
-                           (original_size[0] * original_size[1])) * 100
-                print(f"Cropping loss: {crop_loss:.1f}%")
-                
-                # Calculate final dimensions
-                current_width, current_height = cropped_img.size
-                
-                # Ensure minimum dimensions are met
-                scale_factor = max(min_dims[0] / current_width, min_dims[1] / current_height)
-                
-                if scale_factor > 1:
-                    final_width = int(current_width * scale_factor)
-                    final_height = int(current_height * scale_factor)
-                    print(f"Upscaling by factor: {scale_factor:.2f}")
-                else:
-                    final_width, final_height = current_width, current_height
-                
-                # Resize image
-                final_img = self.resize_with_quality(cropped_img, (final_width, final_height))
-                
-                # Enhance quality if requested
-                if enhance_quality:
-                    final_img = self.enhance_image_quality(final_img)
-                
-                # Prepare output filename
-                input_name = Path(input_path).stem
-                output_filename = f"{input_name}_{target_format}.{output_format.lower()}"
-                output_path = Path(output_dir) / output_filename
-                
-                # Save with appropriate quality settings
-                save_kwargs = {'dpi': (self.target_dpi, self.target_dpi)}
-                
-                if output_format.upper() == 'JPG':
-                    save_kwargs.update({
-                        'quality': 95,
-                        'optimize': True,
-                        'progressive': True
-                    })
-                elif output_format.upper() == 'PNG':
-                    save_kwargs.update({
-                        'optimize': True,
-                        'compress_level': 6
-                    })
-                
-                final_img.save(output_path, **save_kwargs)
-                
-                print(f"✓ Processed: {output_filename}")
-                print(f"  Final size: {final_width}x{final_height}")
-                print(f"  Format: {output_format}")
-                print(f"  Aspect ratio: {target_ratio[0]}:{target_ratio[1]}")
-                print(f"  File saved: {output_path}")
-                
-                return str(output_path)
+            img, (target_format,) = self.load_source(input_path, output_format, [target_format])
+            final_img, target_format = self.render(img, target_format, enhance_quality)
+            return self.save(final_img, input_path, output_dir, target_format, output_format, platform)
                 
         except Exception as e:
             print(f"✗ Error processing {input_path}: {str(e)}")
             return None
+
+    def render_derivatives(self, input_path, targets, output_format='PNG', enhance_quality=True,
+                           max_workers=None):
+        """
+        Render several variants of one image from a single decode
+        
+        The source is decoded and color-converted once and shared read-only;
+        each distinct target format is cropped/resized once, and every
+        requested output is encoded in parallel.
+        
+        Args:
+            input_path: Path to input image
+            targets: Dict of key -> (target_format, output_dir), e.g. one entry per platform;
+                with output_format 'AUTO' the key also selects the platform's byte budget
+            output_format: 'PNG', 'JPG' or 'AUTO'
+            enhance_quality: Whether to apply quality enhancements
+            max_workers: Thread count (default: one per output)
+            
+        Returns:
+            dict: key -> output path, or None for outputs that failed
+        """
+        variants = self._render_variants(input_path, targets, output_format, enhance_quality, max_workers)
+        return {key: path for key, (_, path) in variants.items()}
+
+    def _render_variants(self, input_path, targets, output_format, enhance_quality, max_workers):
+        """render_derivatives, returning key -> (resolved target format, output path or None)"""
+        if not targets:
+            return {}
+
+        # 'auto' is resolved once, so it shares a render with an explicit request for the same format
+        keys = list(targets)
+        try:
+            img, resolved = self.load_source(input_path, output_format, [targets[key][0] for key in keys])
+        except Exception as e:
+            print(f"✗ Error processing {input_path}: {str(e)}")
+            return {key: (None, None) for key in targets}
+        formats = dict(zip(keys, resolved))
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers or len(targets)) as executor:
+            renders = {
+                fmt: executor.submit(self.render, img, fmt, enhance_quality)
+                for fmt in dict.fromkeys(formats.values())
+            }
+
+            def encode(key):
+                final_img, target_format = renders[formats[key]].result()
+                return self.save(final_img, input_path, targets[key][1], target_format, output_format, key)
+
+            saves = {executor.submit(encode, key): key for key in targets}
+            for future in as_completed(saves):
+                key = saves[future]
+                try:
+                    results[key] = (formats[key], future.result())
+                except Exception as e:
+                    print(f"✗ Error rendering {key} for {input_path}: {str(e)}")
+                    results[key] = (formats[key], None)
+        return results
     
-    def batch_process(self, input_dir, output_dir, formats=None, output_format='PNG', auto_detect=True):
+    def batch_process(self, input_dir, output_dir, formats=None, output_format='PNG', auto_detect=True,
+                      enhance_quality=True, max_workers=None):
         """
         Batch process multiple images
         
+        Images are spread over a process pool (one optimizer per worker
+        process); each worker decodes an image once, renders every requested
+        format from it and reports the format it actually used, so nothing
+        is re-opened for the summary. Results are printed as they complete.
+        
         Args:
             input_dir: Directory containing input images
             output_dir: Directory to save processed images
             formats: List of formats to generate or None for auto-detection
-            output_format: 'PNG' or 'JPG'
+            output_format: 'PNG', 'JPG' or 'AUTO'
             auto_detect: Whether to auto-detect best format for each image
+            enhance_quality: Whether to apply quality enhancements
+            max_workers: Worker processes (default: one per CPU core)
         """
         if auto_detect:
             formats = ['auto']  # Use auto-detection for each image
@@ -232,19 +397,19 @@ class SocialMediaImageOptimizer:
         # Supported image extensions
         supported_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
         
-        # Find all image files
-        input_path = Path(input_dir)
-        image_files = []
-        
-        for ext in supported_extensions:
-            image_files.extend(input_path.glob(f"*{ext}"))
-            image_files.extend(input_path.glob(f"*{ext.upper()}"))
+        # Find all image files in a single directory scan
+        with os.scandir(input_dir) as entries:
+            image_files = sorted(
+                entry.path for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in supported_extensions
+            )
         
         if not image_files:
             print(f"No supported image files found in {input_dir}")
             return
         
-        print(f"Found {len(image_files)} image(s) to process")
+        workers = min(max_workers or os.cpu_count() or 1, len(image_files))
+        print(f"Found {len(image_files)} image(s) to process with {workers} worker process(es)")
         if auto_detect:
             print("Mode: Auto-detect best aspect ratio for each image")
         else:
@@ -255,26 +420,27 @@ class SocialMediaImageOptimizer:
         processed_count = 0
         format_summary = {'landscape': 0, 'square': 0, 'portrait': 0}
         
-        for img_file in image_files:
-            print(f"\nProcessing: {img_file.name}")
-            
-            for format_type in formats:
-                result = self.process_image(
-                    str(img_file), 
-                    output_dir, 
-                    format_type, 
-                    output_format
-                )
-                if result:
-                    processed_count += 1
-                    # Track which format was used (for auto-detection)
-                    if format_type == 'auto':
-                        # Detect the format that was actually used
-                        with Image.open(img_file) as temp_img:
-                            detected_format = self.detect_best_aspect_ratio(temp_img.width, temp_img.height)
-                            format_summary[detected_format] += 1
-                    else:
-                        format_summary[format_type] += 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as executor:
+            futures = {
+                executor.submit(_process_batch_image, img_file, output_dir, formats, output_format, enhance_quality):
+                    img_file
+                for img_file in image_files
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                img_file = futures[future]
+                try:
+                    variants = future.result()
+                except Exception as e:
+                    print(f"✗ [{done}/{len(image_files)}] {Path(img_file).name}: {str(e)}")
+                    continue
+                
+                for detected_format, path in variants:
+                    if path:
+                        processed_count += 1
+                        format_summary[detected_format] += 1
+                outputs = ', '.join(Path(path).name for _, path in variants if path) or 'failed'
+                print(f"{'✓' if outputs != 'failed' else '✗'} [{done}/{len(image_files)}] "
+                      f"{Path(img_file).name} -> {outputs}")
         
         print(f"\n{'='*50}")
         print(f"Batch processing complete!")
@@ -286,6 +452,29 @@ class SocialMediaImageOptimizer:
                     print(f"  {fmt.capitalize()}: {count} images")
         print(f"Output directory: {output_dir}")
 
+
+_batch_optimizer = None
+
+
+def _init_batch_worker():
+    """Builds one optimizer per batch worker process"""
+    global _batch_optimizer
+    _batch_optimizer = SocialMediaImageOptimizer()
+
+
+def _process_batch_image(input_path, output_dir, formats, output_format, enhance_quality):
+    """
+    Batch worker: render every requested format of one image from a single decode.
+    
+    Returns:
+        list: (detected format, output path or None) per requested format
+    """
+    optimizer = _batch_optimizer or SocialMediaImageOptimizer()
+    targets = {fmt: (fmt, output_dir) for fmt in formats}
+    # One thread per worker process: the pool already uses every core
+    variants = optimizer._render_variants(input_path, targets, output_format, enhance_quality, max_workers=1)
+    return [variants[fmt] for fmt in formats]
+
 def main():
     parser = argparse.ArgumentParser(
         description="Advanced Social Media Image Optimizer",
@@ -319,11 +508,13 @@ Examples:
                        help='Target format(s). Use "auto" for intelligent detection (default: auto)')
     parser.add_argument('--manual', action='store_true',
                        help='Disable auto-detection and use specified formats')
-    parser.add_argument('--format', choices=['PNG', 'JPG'],
+    parser.add_argument('--format', choices=['PNG', 'JPG', 'AUTO'],
                        default='PNG',
-                       help='Output file format (default: PNG)')
+                       help='Output file format; AUTO encodes WebP/AVIF/JPG to a size budget (default: PNG)')
     parser.add_argument('--no-enhance', action='store_true',
                        help='Skip quality enhancement')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Worker processes for directory input (default: one per CPU core)')
     
     args = parser.parse_args()
     
@@ -367,7 +558,9 @@ Examples:
             args.output,
             args.formats if args.manual else None,
             args.format,
-            not args.manual  # auto_detect=True unless manual mode
+            not args.manual,  # auto_detect=True unless manual mode
+            not args.no_enhance,
+            args.workers
         )
     
     else:
@@ -17,7 +17,6 @@ from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional, Union
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import tempfile
 from PIL import Image
 from dotenv import load_dotenv
 
@@ -134,10 +133,26 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
             self.logger.error(f"❌ Error initializing components: {e}")
             sys.exit(1)
     
-    def detect_product_in_image(self, image_path: str) -> Dict[str, any]:
+    IMAGE_ANALYSIS_PROMPT = (
+        "Analyze this image for social media optimization. Describe:\n"
+        "1. Main subjects, objects, and people in the image\n"
+        "2. Colors, lighting, and visual composition\n"
+        "3. Mood, atmosphere, and emotions conveyed\n"
+        "4. Any text, brands, logos, or products visible\n"
+        "5. Setting, location, or environment\n"
+        "6. Potential target audience and use cases\n"
+        "7. Overall vibe and story the image tells\n"
+        "Provide a comprehensive description for hashtag and content optimization."
+    )
+    
+    def detect_product_in_image(self, image_path: str, with_description: bool = False) -> Dict[str, any]:
         """
         Detect if the image contains a product that covers 70% of the image
         or has a plain background with no humans
+        
+        With with_description=True the same vision request also returns the
+        full image description (IMAGE_ANALYSIS_PROMPT) as "image_description",
+        so the image is only sent to the model once.
         """
         self.logger.info(f"🔍 Analyzing image for product detection: {image_path}")
         
@@ -162,27 +177,21 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
             "  \"recommendation\": \"explanation of why it's suitable or not\"\n"
             "}"
         )
+        if with_description:
+            detection_prompt += (
+                "\n\nAlso add an \"image_description\" key to the same JSON object. Its value must be "
+                "a single plain-text string (\"image_description\": \"<string>\"), not an object or list, "
+                "answering the following in prose:\n" + self.IMAGE_ANALYSIS_PROMPT
+            )
         
         try:
-            analysis_result = self.image_analyzer.analyze_image_from_file(
-                image_path, 
-                prompt=detection_prompt
-            )
-            
             # Try to parse JSON from the response
             try:
-                # Extract JSON from response if it's wrapped in text
-                if "```json" in analysis_result:
-                    start = analysis_result.find("```json") + 7
-                    end = analysis_result.find("```", start)
-                    json_str = analysis_result[start:end].strip()
-                else:
-                    # Try to find JSON-like content
-                    start = analysis_result.find("{")
-                    end = analysis_result.rfind("}") + 1
-                    json_str = analysis_result[start:end]
-                
-                detection_data = json.loads(json_str)
+                # One JSON-mode request on a downscaled copy, cached by image digest
+                detection_data = self.image_analyzer.analyze_image_structured(
+                    image_path, 
+                    prompt=detection_prompt
+                )
                 
                 # Determine if product photography should be offered
                 product_suitable = (
@@ -421,14 +430,14 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
             return False
     
     def get_image_description(self, image_path: str, user_description: Optional[str] = None, 
-                            use_ai_analysis: bool = False) -> str:
-        """Get image description based on user preference"""
+                            use_ai_analysis: bool = False, ai_description: Optional[str] = None) -> str:
+        """Get image description based on user preference (ai_description: already obtained with product detection)"""
         
         if user_description and user_description.strip():
             self.logger.info("👤 Using user-provided description")
             if use_ai_analysis:
                 self.logger.info("🔄 Combining user description with AI analysis")
-                ai_description = self.analyze_image_with_ai(image_path)
+                ai_description = ai_description or self.analyze_image_with_ai(image_path)
                 if "Error analyzing image" not in ai_description:
                     combined_description = f"""
                     USER DESCRIPTION:
@@ -450,7 +459,7 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
         
         elif use_ai_analysis:
             self.logger.info("🤖 Using AI-powered image analysis")
-            return self.analyze_image_with_ai(image_path)
+            return ai_description or self.analyze_image_with_ai(image_path)
         
         else:
             self.logger.warning("No image description provided and AI analysis disabled")
@@ -460,22 +469,10 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
         """Analyze image content using AI vision"""
         self.logger.info(f"🖼️ Analyzing image content: {image_path}")
         
-        analysis_prompt = (
-            "Analyze this image for social media optimization. Describe:\n"
-            "1. Main subjects, objects, and people in the image\n"
-            "2. Colors, lighting, and visual composition\n"
-            "3. Mood, atmosphere, and emotions conveyed\n"
-            "4. Any text, brands, logos, or products visible\n"
-            "5. Setting, location, or environment\n"
-            "6. Potential target audience and use cases\n"
-            "7. Overall vibe and story the image tells\n"
-            "Provide a comprehensive description for hashtag and content optimization."
-        )
-        
         try:
             image_description = self.image_analyzer.analyze_image_from_file(
                 image_path, 
-                prompt=analysis_prompt
+                prompt=self.IMAGE_ANALYSIS_PROMPT
             )
             
             if "Error analyzing image" in image_description:
@@ -510,28 +507,21 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
         
         return article_content
     
-    def get_hashtags(self, content_article: str, platform: str) -> tuple:
-        """Get hashtags for a specific platform"""
+    def get_hashtags(self, content_description: str, platform: str) -> tuple:
+        """
+        Get hashtags for a specific platform
+        
+        Niche detection and hashtag scraping work from a platform-neutral
+        article and are memoized by the hashtag analyzer, so they run once
+        per image; only the final per-platform selection runs here.
+        """
         self.logger.info(f"🔍 Analyzing hashtags for {platform}")
         
         try:
-            # Create temporary file for the article
-            temp_file = Path(tempfile.gettempdir()) / f"temp_article_{platform}_{self.session_id}.txt"
-            
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                f.write(content_article)
-            
-            # Get niches
-            niches = self.hashtag_analyzer.get_niches(content_article)
+            shared_article = self.create_content_article(content_description, "all platforms")
+            niches, all_hashtag_text = self.hashtag_analyzer.get_hashtag_pool(shared_article)
             self.logger.info(f"🎯 Extracted niches for {platform}: {niches}")
             
-            # Get hashtag data for each niche using the correct method name
-            all_hashtag_text = ""
-            
-            for niche in niches:
-                hashtag_text = self.hashtag_analyzer.scrape_hashtags_from_multiple_sources(niche)
-                all_hashtag_text += hashtag_text + "\n"
-            
             # Generate hashtags
             hashtags = self.hashtag_analyzer.analyze_hashtags(all_hashtag_text, platform)
             
@@ -540,9 +530,6 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
                 hashtag_list = [f"#{tag.strip()}" for tag in hashtags.split(',') if tag.strip()]
                 hashtags = ' '.join(hashtag_list)
             
-            # Clean up temp file
-            temp_file.unlink(missing_ok=True)
-            
             return hashtags, niches
             
         except Exception as e:
@@ -585,8 +572,24 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
                 "error": str(e)
             }
     
+    def render_platform_images(self, image_path: str, platforms: List[str], output_format: str,
+                               product_images: Dict[str, str] = None) -> Dict[str, str]:
+        """Render every platform's image variant from a single decode of the source"""
+        targets = {}
+        for platform in platforms:
+            if product_images and platform in product_images:
+                continue
+            platform_output_dir = self.results_dir / platform.lower()
+            platform_output_dir.mkdir(parents=True, exist_ok=True)
+            targets[platform] = (self.PLATFORM_IMAGE_FORMATS.get(platform, "auto"), str(platform_output_dir))
+        
+        if targets:
+            self.logger.info(f"🖼️ Rendering {len(targets)} platform image(s) from one decode...")
+        return self.image_optimizer.render_derivatives(image_path, targets, output_format, enhance_quality=True)
+    
     def process_single_platform(self, image_path: str, platform: str, content_description: str, 
-                               output_format: str, product_images: Dict[str, str] = None) -> dict:
+                               output_format: str, product_images: Dict[str, str] = None,
+                               rendered_images: Dict[str, str] = None) -> dict:
         """Process optimization for a single platform"""
         start_time = time.time()
         platform_emoji = self.SUPPORTED_PLATFORMS[platform]["emoji"]
@@ -597,6 +600,9 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
             if product_images and platform in product_images:
                 processed_image_path = product_images[platform]
                 self.logger.info(f"🎨 Using product photography image for {platform}")
+            elif rendered_images and rendered_images.get(platform):
+                # Already rendered alongside the other platforms by render_platform_images
+                processed_image_path = rendered_images[platform]
             else:
                 # Process image for platform
                 target_format = self.PLATFORM_IMAGE_FORMATS.get(platform, "auto")
@@ -608,14 +614,15 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
                     str(platform_output_dir), 
                     target_format, 
                     output_format, 
-                    enhance_quality=True
+                    enhance_quality=True,
+                    platform=platform
                 )
             
             # Create content article
             content_article = self.create_content_article(content_description, platform)
             
-            # Get hashtags
-            hashtags, niches = self.get_hashtags(content_article, platform)
+            # Get hashtags (niches and scraping are shared with the other platforms)
+            hashtags, niches = self.get_hashtags(content_description, platform)
             
             # Get profile suggestions
             profile_results = self.get_profile_suggestions(content_article, platform)
@@ -650,7 +657,7 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
             }
     
     def run_optimization(self, image_path: str, platforms: List[str], user_description: Optional[str] = None, 
-                        use_ai_analysis: bool = False, output_format: str = "PNG", max_workers: int = 3) -> Dict[str, dict]:
+                        use_ai_analysis: bool = False, output_format: str = "AUTO", max_workers: int = 3) -> Dict[str, dict]:
         """Run optimization for multiple platforms with product photography integration"""
         total_start_time = time.time()
         
@@ -659,9 +666,13 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
         self.logger.info(f"🎯 Platforms: {', '.join(platforms)}")
         self.logger.info(f"🆔 Session ID: {self.session_id}")
         
-        # Step 1: Product Detection
+        # Step 1: Product Detection (and the AI description, in the same vision request)
         self.logger.info("🔍 Performing product detection...")
-        detection_data = self.detect_product_in_image(image_path)
+        detection_data = self.detect_product_in_image(image_path, with_description=use_ai_analysis)
+        ai_description = detection_data.pop("image_description", None)
+        if not isinstance(ai_description, str) or not ai_description.strip():
+            # Missing or structured (object/list) value: get_image_description falls back to its own request
+            ai_description = None
         
         # Step 2: Ask for product photography if suitable
         product_images = {}
@@ -682,14 +693,28 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
                     image_path, product_name, platforms, settings
                 )
         
+        # Render platform images in the background while the description is generated
+        render_executor = ThreadPoolExecutor(max_workers=1)
+        render_future = render_executor.submit(
+            self.render_platform_images, image_path, platforms, output_format, product_images
+        )
+        render_executor.shutdown(wait=False)
+        
         # Step 3: Get image description based on user preference
         self.logger.info("📸 Getting image description...")
-        content_description = self.get_image_description(image_path, user_description, use_ai_analysis)
+        content_description = self.get_image_description(image_path, user_description, use_ai_analysis,
+                                                         ai_description)
         
         if "Error analyzing image" in content_description and not user_description:
             self.logger.error(f"❌ Image description failed: {content_description}")
             return {}
         
+        try:
+            rendered_images = render_future.result()
+        except Exception as e:
+            self.logger.error(f"❌ Error rendering platform images: {e}")
+            rendered_images = {}
+        
         # Step 4: Process platforms in parallel
         self.logger.info(f"🔄 Processing {len(platforms)} platform(s) in parallel...")
         
@@ -705,7 +730,8 @@ class EnhancedMultiPlatformSocialMediaOrchestrator:
                     platform,
                     content_description,
                     output_format,
-                    product_images
+                    product_images,
+                    rendered_images
                 ): platform 
                 for platform in platforms
             }
@@ -1023,9 +1049,10 @@ Examples:
     # Optional arguments
     parser.add_argument(
         "--format",
-        choices=["PNG", "JPG"],
-        default="PNG",
-        help="Output image format (default: PNG)"
+        choices=["AUTO", "PNG", "JPG"],
+        default="AUTO",
+        help="Output image format; AUTO encodes each platform's image to its size budget "
+             "as WebP/AVIF/JPG, whichever the platform accepts (default: AUTO)"
     )
     
     parser.add_argument(
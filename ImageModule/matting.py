@@ -0,0 +1,132 @@
+"""
+Background Matting Service
+Keeps a single rembg (U²-Net) session warm for the whole process and caches
+RGBA mattes on disk, keyed by the SHA-256 of the input image bytes, so a
+logo or product shot is only ever segmented once.
+
+The same module is shipped with ImageModule and Ai_video_optimizer, so both
+produce identical mattes for a given cache entry. Entries are namespaced
+per model under cache/mattes/<model>.
+"""
+
+import io
+import os
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from PIL import Image
+from rembg import new_session, remove
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "u2net"
+DEFAULT_CACHE_ROOT = os.getenv("MATTE_CACHE_DIR", os.path.join("cache", "mattes"))
+
+
+class MattingService:
+    """Background removal with a resident rembg session and an on-disk matte cache"""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, cache_root: str = DEFAULT_CACHE_ROOT):
+        """
+        Initialize the matting service
+
+        Args:
+            model_name: rembg model to load (loaded lazily on first cache miss)
+            cache_root: Directory under which RGBA mattes and scaled variants
+                are stored, in one subdirectory per model
+        """
+        self.model_name = model_name
+        self.cache_dir = Path(cache_root) / model_name
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._session = None
+        self._lock = threading.Lock()
+        self._mattes: Dict[str, Image.Image] = {}
+
+    def _get_session(self):
+        """Create the rembg session once; ONNX model load is the expensive part"""
+        if self._session is None:
+            logger.info(f"Loading rembg session: {self.model_name}")
+            self._session = new_session(self.model_name)
+        return self._session
+
+    @staticmethod
+    def _atomic_save(image: Image.Image, path: Path) -> None:
+        """Write via a temp file so concurrent jobs never read a half-written PNG"""
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_bytes(image: Union[str, bytes]) -> bytes:
+        if isinstance(image, bytes):
+            return image
+        with open(image, "rb") as f:
+            return f.read()
+
+    def remove_background(self, image: Union[str, bytes]) -> Image.Image:
+        """
+        Return the background-removed RGBA version of an image
+
+        Args:
+            image: Path to the image file or its raw bytes
+
+        Returns:
+            RGBA PIL image (a copy, safe for the caller to modify)
+        """
+        data = self._read_bytes(image)
+        key = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            matte = self._mattes.get(key)
+            if matte is None:
+                cache_path = self.cache_dir / f"{key}.png"
+                if cache_path.exists():
+                    matte = Image.open(cache_path).convert("RGBA")
+                    logger.debug(f"Matte cache hit: {cache_path}")
+                else:
+                    source = Image.open(io.BytesIO(data)).convert("RGBA")
+                    matte = remove(source, session=self._get_session()).convert("RGBA")
+                    self._atomic_save(matte, cache_path)
+                    logger.info(f"Matte cached: {cache_path}")
+                self._mattes[key] = matte
+
+        return matte.copy()
+
+    def scaled_matte(self, image: Union[str, bytes], height: int) -> Tuple[str, Tuple[int, int]]:
+        """
+        Return a background-removed variant resized to a target height
+
+        Args:
+            image: Path to the image file or its raw bytes
+            height: Target height in pixels (width keeps the aspect ratio)
+
+        Returns:
+            (path to the cached RGBA PNG, (width, height))
+        """
+        data = self._read_bytes(image)
+        key = hashlib.sha256(data).hexdigest()
+        variant_path = self.cache_dir / f"{key}_h{height}.png"
+        if variant_path.exists():
+            with Image.open(variant_path) as variant:
+                return str(variant_path), variant.size
+
+        matte = self.remove_background(data)
+        width = max(1, round(matte.width * height / matte.height))
+        self._atomic_save(matte.resize((width, height), Image.LANCZOS), variant_path)
+        return str(variant_path), (width, height)
+
+
+_service: Optional[MattingService] = None
+_service_lock = threading.Lock()
+
+
+def get_matting_service() -> MattingService:
+    """Return the process-wide matting service"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = MattingService()
+        return _service
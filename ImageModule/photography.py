@@ -39,7 +39,7 @@ import time
 # Third-party imports
 try:
     import PIL.Image
-    from rembg import remove
+    from matting import get_matting_service
     from openai import OpenAI
     from dotenv import load_dotenv
     import requests  # For downloading images from URLs
@@ -327,9 +327,8 @@ class ProductPhotoGenerator:
             output_path: Path to save the mask
         """
         try:
-            with open(image_path, "rb") as inp_file:
-                input_image = PIL.Image.open(inp_file).convert("RGBA")
-                mask_image = remove(input_image)
+            # Shared service: warm rembg session + on-disk matte cache by image hash
+            mask_image = get_matting_service().remove_background(image_path)
             
             mask_image.save(output_path, format="PNG")
             self.temp_files.append(output_path)  # Track for cleanup
@@ -1,14 +1,57 @@
 import os
+import io
 import base64
-import requests
+import hashlib
+from pathlib import Path
 from openai import OpenAI
-from typing import Optional, Union
+from typing import Dict, Optional
 import json
+from PIL import Image, ImageOps
 from dotenv import load_dotenv
 load_dotenv()
 
 api_key = os.getenv('OPENAI_API_KEY')
 
+# The vision model rescales every image to fit 2048x2048 and then to 768px on the
+# shortest side before tiling, so anything larger is wasted upload bytes.
+VISION_MAX_SIDE = 2048
+VISION_SHORT_SIDE = 768
+ORIENTATION_TAG = 0x0112  # EXIF Orientation
+VISION_CACHE_DIR = os.getenv("VISION_CACHE_DIR", os.path.join("cache", "vision"))
+
+
+def prepare_image_for_vision(raw: bytes) -> str:
+    """
+    Decode an image file's bytes once, upright it from its EXIF orientation,
+    downscale it in memory to the model's effective resolution and return it
+    as a JPEG data URL.
+    """
+    with Image.open(io.BytesIO(raw)) as img:
+        scale = min(1.0, VISION_MAX_SIDE / max(img.size), VISION_SHORT_SIDE / min(img.size))
+        upright = img.getexif().get(ORIENTATION_TAG, 1) == 1
+        passthrough = img.format == 'JPEG' and scale == 1.0 and upright
+        if img.format == 'JPEG':
+            img.draft('RGB', (max(1, round(img.width * scale)), max(1, round(img.height * scale))))
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA' if 'A' in img.getbands() or img.mode == 'P' else 'RGB')
+
+    if passthrough:
+        # Already small enough and upright: send the original JPEG bytes rather than re-encoding
+        return f"data:image/jpeg;base64,{base64.b64encode(raw).decode('utf-8')}"
+
+    if img.mode == 'RGBA':
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        img = background
+    scale = min(1.0, VISION_MAX_SIDE / max(img.size), VISION_SHORT_SIDE / min(img.size))
+    target = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    if img.size != target:
+        img = img.resize(target, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=85)
+    return f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"
+
 class ImageAnalyzer:
     def __init__(self, api_key: Optional[str] = None):
         """
@@ -84,16 +127,8 @@ class ImageAnalyzer:
             Detailed description of the image
         """
         try:
-            # Read and encode the image
-            with open(file_path, "rb") as image_file:
-                base64_image = base64.b64encode(image_file.read()).decode('utf-8')
-            
-            # Determine the image format
-            file_extension = file_path.lower().split('.')[-1]
-            if file_extension == 'jpg':
-                file_extension = 'jpeg'
-            
-            data_url = f"data:image/{file_extension};base64,{base64_image}"
+            # Downscaled in memory to what the model actually looks at
+            data_url = prepare_image_for_vision(Path(file_path).read_bytes())
             
             response = self.client.chat.completions.create(
                 model=model,
@@ -120,6 +155,73 @@ class ImageAnalyzer:
         except Exception as e:
             return f"Error analyzing image: {str(e)}"
     
+    def analyze_image_structured(self, 
+                                 file_path: str, 
+                                 prompt: str,
+                                 model: str = "gpt-4.1-nano",
+                                 detail_level: str = "high",
+                                 cache_dir: str = VISION_CACHE_DIR) -> Dict:
+        """
+        Analyze a local image with a prompt that asks for a JSON object.
+        
+        The image is downscaled before upload, and results are cached on disk
+        by a digest of the file's exact bytes together with the prompt and
+        model, so the same photo is only analyzed once.
+        
+        Args:
+            file_path: Path to the local image file
+            prompt: Prompt describing the JSON object to return
+            model: OpenAI model to use
+            detail_level: "high", "low", or "auto"
+            cache_dir: Directory for cached results
+        
+        Returns:
+            Parsed JSON response
+        
+        Raises:
+            Exception: On API errors or a response that is not valid JSON
+        """
+        raw = Path(file_path).read_bytes()
+        image_digest = hashlib.sha256(raw).hexdigest()
+        request_hash = hashlib.sha256(f"{model}\n{detail_level}\n{prompt}".encode('utf-8')).hexdigest()[:16]
+        cache_path = Path(cache_dir) / f"{image_digest}_{request_hash}.json"
+        
+        if cache_path.exists():
+            try:
+                return json.loads(cache_path.read_text(encoding='utf-8'))
+            except (OSError, json.JSONDecodeError):
+                pass
+        
+        # Only a cache miss pays for the decode, resize and re-encode
+        data_url = prepare_image_for_vision(raw)
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": data_url,
+                                "detail": detail_level
+                            }
+                        }
+                    ]
+                }
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=1500
+        )
+        result = json.loads(response.choices[0].message.content)
+        
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(tmp_path, cache_path)
+        return result
+    
     def analyze_multiple_images(self, 
                                image_urls: list, 
                                prompt: str = "Compare and describe these images in detail.",
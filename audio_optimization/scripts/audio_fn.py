@@ -1,19 +1,61 @@
 import os
 import uuid
-import json
 import whisper # type: ignore
-import subprocess
 import tempfile
-from pathlib import Path
-from pydub import AudioSegment # type: ignore
+import threading
+import time
+import numpy as np
 from df.enhance import enhance, init_df, load_audio # type: ignore
 from utils import (
     generate_transcription_and_timestamps,
-    save_transcript_text,
-    save_word_timestamps,
-    remove_non_word_regions,
-    save_transcript_metadata
+    remove_non_word_regions
 )
+from artifacts import RunArtifacts, TranscriptResult
+from vad import detect_speech
+from loudness import write_normalized
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "turbo")
+
+# Models are loaded on first use and kept for the life of the process,
+# so a long-running worker pays for each load only once.
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_df_model():
+    """Returns the (model, df_state) DeepFilterNet pair, loading it once per process."""
+    with _models_lock:
+        if "df" not in _models:
+            model, df_state, _ = init_df()
+            _models["df"] = (model, df_state)
+        return _models["df"]
+
+
+def get_whisper_model(name=WHISPER_MODEL):
+    """Returns the Whisper model `name`, loading it once per process."""
+    key = f"whisper:{name}"
+    with _models_lock:
+        if key not in _models:
+            _models[key] = whisper.load_model(name)
+        return _models[key]
+
+
+def load_models():
+    """
+    Loads every model the pipeline needs up front.
+
+    Returns:
+    --------
+    dict
+        Seconds spent loading each model (near zero if it was already resident).
+    """
+    timings = {}
+    for name, loader in (("load_deepfilternet", get_df_model), ("load_whisper", get_whisper_model)):
+        start = time.perf_counter()
+        loader()
+        timings[name] = round(time.perf_counter() - start, 3)
+    return timings
+
 
 def denoise_audio(input_path):
     """
@@ -31,51 +73,64 @@ def denoise_audio(input_path):
     sample_rate : int
         The sample rate used for audio processing, as expected by the DeepFilterNet model.
     """
-    model, df_state, _ = init_df()
+    model, df_state = get_df_model()
     audio, _ = load_audio(input_path, sr=df_state.sr())
     enhanced = enhance(model, df_state, audio)
     return enhanced, df_state.sr()
 
 
-def disfluency_removal(audio_seg, sr):
+def disfluency_removal(audio_seg, sr, artifacts=None):
     """
     Removes disfluencies (filler words) from an AudioSegment.
-    Saves transcript, timestamps, and UUID metadata.
+    Saves transcript, timestamps, and UUID metadata into the run's artifact directory.
+
+    Returns (cleaned_audio, TranscriptResult) so the caller gets the transcript directly.
     """
-    model = whisper.load_model("turbo")
+    model = get_whisper_model()
     filler_words = {"um", "uh", "ah", "erm", "mm", "hmm"}
     buffer_sec = 0.05
     fade_ms = 20
+    artifacts = artifacts or RunArtifacts(str(uuid.uuid4()))
 
     with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
         temp_path = temp_wav.name
         audio_seg.export(temp_path, format="wav")
 
-    try:
-        full_text, words = generate_transcription_and_timestamps(model, temp_path)
+    # Only detected speech is transcribed; timestamps are mapped back afterwards
+    samples = np.asarray(audio_seg.get_array_of_samples())
+    if audio_seg.channels > 1:
+        samples = samples.reshape(-1, audio_seg.channels)
+    scale = float(1 << (8 * audio_seg.sample_width - 1))
+    speech_map = detect_speech(samples.astype(np.float32) / scale, audio_seg.frame_rate)
+    print(f"🗣️ Speech detected: {speech_map.speech_duration:.1f}s of {speech_map.duration:.1f}s "
+          f"in {len(speech_map.regions)} regions")
+
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as speech_wav:
+        speech_path = speech_wav.name
+        audio_seg._spawn(speech_map.compact(samples, audio_seg.frame_rate).tobytes()).export(speech_path, format="wav")
 
-        file_uuid = str(uuid.uuid4())
-        output_dir = "output"
-        transcript_path = os.path.join(output_dir, f"{file_uuid}.txt")
-        word_ts_path = os.path.join(output_dir, f"{file_uuid}_timestamps.json")
+    try:
+        full_text, words = generate_transcription_and_timestamps(model, speech_path)
+        words = speech_map.remap_words(words)
 
-        save_transcript_text(full_text, transcript_path)
-        save_word_timestamps(words, word_ts_path)
-        save_transcript_metadata(file_uuid, output_dir)
+        transcript = artifacts.save_transcript(
+            TranscriptResult(transcript_uuid=str(uuid.uuid4()), text=full_text, words=words)
+        )
 
-        cleaned_audio = remove_non_word_regions(temp_path, words, filler_words, buffer_sec, fade_ms)
+        cleaned_audio = remove_non_word_regions(temp_path, words, filler_words, buffer_sec, fade_ms, speech_map)
     finally:
         os.remove(temp_path)
+        os.remove(speech_path)
 
-    return cleaned_audio
+    return cleaned_audio, transcript
 
-def normalize_audio(audio_seg, output_path, apply_normalization=True):
+def normalize_audio(audio_seg, output_path, apply_normalization=True, mode=None):
     """
-    Normalize and optionally compress an audio segment using ffmpeg filters.
+    Compress, loudness-normalize and true-peak limit an audio segment in process.
 
-    This function exports the given AudioSegment to a temporary WAV file,
-    then applies audio compression and loudness normalization filters using ffmpeg,
-    and saves the processed audio to the specified output path.
+    The segment's samples are run through the native engine in `loudness.py`
+    on numpy blocks and written in a single encode; no ffmpeg process or
+    temp file is involved.
 
     Parameters:
     -----------
@@ -86,30 +141,20 @@ def normalize_audio(audio_seg, output_path, apply_normalization=True):
     apply_normalization : bool, optional (default=True)
         Whether to apply loudness normalization along with compression.
         If False, only compression is applied.
+    mode : str, optional
+        "two_pass" (exact integrated loudness) or "streaming" (bounded memory).
+        Defaults to the AUDIO_NORMALIZE_MODE environment variable, then "two_pass".
 
     Effects:
     --------
     - Applies dynamic range compression with threshold -30dB, ratio 6, attack 10ms, release 1000ms.
-    - Applies loudness normalization to target integrated loudness of -16 LUFS,
-      true peak of -1.5 dB, and loudness range of 11 LU.
+    - Applies loudness normalization to a BS.1770 integrated loudness of -16 LUFS
+      and limits true peaks to -1.5 dBTP.
     - Saves the processed audio at `output_path`.
     """
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as raw_file:
-        audio_seg.export(raw_file.name, format="wav")
-
-    compress_filter = "acompressor=threshold=-30dB:ratio=6:attack=10:release=1000"
-    normalize_filter = "loudnorm=I=-16:TP=-1.5:LRA=11"
-
-    if apply_normalization:
-        subprocess.run([
-            "ffmpeg", "-y", "-i", raw_file.name,
-            "-af", f"{compress_filter},{normalize_filter}",
-            output_path
-        ], check=True)
-    else:
-        subprocess.run([
-            "ffmpeg", "-y", "-i", raw_file.name,
-            "-af", compress_filter,
-            output_path
-        ], check=True)
-
+    samples = np.asarray(audio_seg.get_array_of_samples(), dtype=np.float32)
+    samples /= float(1 << (8 * audio_seg.sample_width - 1))
+    if audio_seg.channels > 1:
+        samples = samples.reshape(-1, audio_seg.channels)
+    write_normalized(samples, audio_seg.frame_rate, output_path, mode=mode,
+                     apply_normalization=apply_normalization)
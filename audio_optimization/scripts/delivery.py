@@ -0,0 +1,221 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import cloudinary  # type: ignore
+import cloudinary.utils  # type: ignore
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry  # type: ignore
+
+# Delivery encodes, keyed by codec. Raw PCM never leaves the machine.
+DELIVERY_FORMATS = {
+    "aac": {"ext": "m4a", "args": ["-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart"]},
+    "mp3": {"ext": "mp3", "args": ["-c:a", "libmp3lame", "-b:a", "128k"]},
+    "opus": {"ext": "opus", "args": ["-c:a", "libopus", "-b:a", "64k"]},
+}
+# Which encode each destination receives
+DESTINATION_FORMATS = {
+    "cloudinary": "aac",
+    "podcast_rss": "mp3",
+    "web": "opus",
+}
+
+UPLOAD_URL = os.getenv("AUDIO_UPLOAD_URL")  # Stand-in endpoint for tests; Cloudinary when unset
+UPLOAD_CHUNK_SIZE = int(float(os.getenv("AUDIO_UPLOAD_CHUNK_MB", "6")) * 1024 * 1024)
+UPLOAD_STATE_DIR = os.path.join("cache", "uploads")
+UPLOAD_STATE_MAX_AGE = 7 * 24 * 3600  # seconds; older checkpoints are abandoned uploads
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="delivery")
+
+
+def encode_for_delivery(input_path, destination="cloudinary", output_path=None, force=False):
+    """
+    Encodes the mastered WAV into the delivery format for `destination`.
+    An existing encode newer than the WAV is reused unless `force` is set,
+    so a retried delivery uploads the same bytes and can resume.
+
+    Returns:
+        str: Path of the encoded file (next to the input unless output_path is given).
+    """
+    codec = DESTINATION_FORMATS.get(destination, "aac")
+    fmt = DELIVERY_FORMATS[codec]
+    if output_path is None:
+        output_path = f"{os.path.splitext(input_path)[0]}.{fmt['ext']}"
+
+    if (not force and os.path.exists(output_path) and os.path.getsize(output_path) > 0
+            and os.path.getmtime(output_path) >= os.path.getmtime(input_path)):
+        print(f"♻️ Reusing {codec.upper()} encode for {destination}: {output_path}")
+        return output_path
+
+    # Encode to a temp name so an interrupted ffmpeg never leaves a "fresh" partial file
+    tmp_path = f"{os.path.splitext(output_path)[0]}.tmp.{fmt['ext']}"
+    subprocess.run([
+        "ffmpeg", "-y", "-v", "error", "-i", input_path, "-vn", *fmt["args"], tmp_path
+    ], check=True)
+    os.replace(tmp_path, output_path)
+
+    in_mb = os.path.getsize(input_path) / 1e6
+    out_mb = os.path.getsize(output_path) / 1e6
+    print(f"🎚️ Encoded {codec.upper()} for {destination}: {in_mb:.1f} MB → {out_mb:.1f} MB")
+    return output_path
+
+
+class ChunkedUploader:
+    """
+    Resumable chunked uploader speaking Cloudinary's chunked upload protocol
+    (X-Unique-Upload-Id + Content-Range per chunk).
+
+    Progress is checkpointed to a small state file after every acknowledged
+    chunk; if the process dies or a chunk keeps failing, the next upload of
+    the same file resumes from the last acknowledged offset with the same
+    upload id instead of starting over. Checkpoints are removed on success,
+    and ones older than UPLOAD_STATE_MAX_AGE are swept on startup.
+    """
+
+    def __init__(self, url=UPLOAD_URL, chunk_size=UPLOAD_CHUNK_SIZE, state_dir=UPLOAD_STATE_DIR,
+                 retries=5, timeout=(10, 300)):
+        self.url = url
+        self.chunk_size = chunk_size
+        self.state_dir = state_dir
+        self.timeout = timeout
+
+        retry = Retry(total=retries, backoff_factor=1.0,
+                      status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset({"POST"}))
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(max_retries=retry))
+        self.session.mount("https://", HTTPAdapter(max_retries=retry))
+        self._sweep_states()
+
+    def _sweep_states(self, max_age=UPLOAD_STATE_MAX_AGE):
+        """Removes checkpoints of uploads that were never resumed."""
+        if not os.path.isdir(self.state_dir):
+            return
+        cutoff = time.time() - max_age
+        for entry in os.scandir(self.state_dir):
+            try:
+                if entry.name.endswith((".json", ".tmp")) and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass  # Another worker swept it first
+
+    def _state_path(self, path, source=None):
+        """
+        Checkpoint location for uploading `path`. When `path` is an encode of
+        `source`, the key is the source file (path, size, mtime) plus the
+        encode's name, so it survives the encode being rewritten.
+        """
+        origin = source or path
+        stat = os.stat(origin)
+        key = f"{os.path.realpath(origin)}:{stat.st_size}:{stat.st_mtime_ns}:{os.path.basename(path)}"
+        return os.path.join(self.state_dir, f"{hashlib.sha256(key.encode()).hexdigest()}.json")
+
+    def _load_state(self, state_path):
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {"upload_id": uuid.uuid4().hex, "offset": 0}
+
+    def _save_state(self, state_path, state):
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+
+    def _endpoint(self, resource_type):
+        if self.url:
+            return self.url
+        return cloudinary.utils.cloudinary_api_url("upload", resource_type=resource_type)
+
+    def _params(self, folder):
+        params = {"folder": folder}
+        if self.url:
+            return params
+        # Signed per request, so a resumed upload never reuses an expired timestamp
+        params["timestamp"] = int(time.time())
+        return cloudinary.utils.sign_request(params, {})
+
+    def upload(self, path, folder="enhanced_audio", resource_type="video", source=None):
+        """
+        Uploads `path` chunk by chunk and returns the endpoint's final JSON response.
+        `source` is the file `path` was encoded from, if any (see _state_path).
+        """
+        total = os.path.getsize(path)
+        if total == 0:
+            raise ValueError(f"Refusing to upload empty file: {path}")
+
+        state_path = self._state_path(path, source)
+        state = self._load_state(state_path)
+        if state.get("size", total) != total:
+            state = {"upload_id": uuid.uuid4().hex, "offset": 0}  # Encode changed: start over
+        state["size"] = total
+        if state["offset"]:
+            print(f"↩️ Resuming upload at {state['offset'] / 1e6:.1f} of {total / 1e6:.1f} MB")
+
+        endpoint = self._endpoint(resource_type)
+        name = os.path.basename(path)
+        result = None
+        with open(path, "rb") as f:
+            f.seek(state["offset"])
+            while state["offset"] < total:
+                chunk = f.read(self.chunk_size)
+                end = state["offset"] + len(chunk) - 1
+                headers = {
+                    "X-Unique-Upload-Id": state["upload_id"],
+                    "Content-Range": f"bytes {state['offset']}-{end}/{total}",
+                }
+                response = self.session.post(endpoint, data=self._params(folder),
+                                             files={"file": (name, chunk)},
+                                             headers=headers, timeout=self.timeout)
+                if response.status_code != 200:
+                    raise RuntimeError(f"Upload failed at byte {state['offset']}: "
+                                       f"{response.status_code} - {response.text[:200]}")
+                result = response.json()
+                state["offset"] = end + 1
+                self._save_state(state_path, state)
+
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return result
+
+
+_shared_uploader = None
+_shared_lock = threading.Lock()
+
+
+def get_uploader():
+    """Process-wide ChunkedUploader, so repeated deliveries share one HTTP session."""
+    global _shared_uploader
+    with _shared_lock:
+        if _shared_uploader is None:
+            _shared_uploader = ChunkedUploader()
+        return _shared_uploader
+
+
+def deliver(wav_path, destination="cloudinary", folder="enhanced_audio"):
+    """Encodes `wav_path` for `destination` and uploads it. Returns {"url", "path", "format"}."""
+    encoded_path = encode_for_delivery(wav_path, destination)
+    result = get_uploader().upload(encoded_path, folder=folder, source=wav_path)
+    return {
+        "url": result["secure_url"],
+        "path": encoded_path,
+        "format": DESTINATION_FORMATS.get(destination, "aac"),
+    }
+
+
+def start_delivery(wav_path, destination="cloudinary", folder="enhanced_audio"):
+    """
+    Runs deliver() on a background thread so the caller can keep working
+    (e.g. generate metadata) while the encode and upload are in flight.
+
+    Returns:
+        concurrent.futures.Future: Resolves to deliver()'s result.
+    """
+    return _executor.submit(deliver, wav_path, destination, folder)
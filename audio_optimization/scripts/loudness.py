@@ -0,0 +1,291 @@
+import os
+import numpy as np
+import soundfile as sf  # type: ignore
+from scipy import signal  # type: ignore
+from scipy.ndimage import minimum_filter1d, uniform_filter1d  # type: ignore
+
+# Same targets as the former ffmpeg chain:
+#   acompressor=threshold=-30dB:ratio=6:attack=10:release=1000, loudnorm=I=-16:TP=-1.5
+TARGET_LUFS = -16.0
+TRUE_PEAK_DB = -1.5
+COMPRESSOR_SETTINGS = {"threshold_db": -30.0, "ratio": 6.0, "attack_ms": 10.0, "release_ms": 1000.0}
+
+NORMALIZE_MODE = os.getenv("AUDIO_NORMALIZE_MODE", "two_pass")  # two_pass | streaming
+BLOCK_SEC = 5.0
+
+_ABS_GATE_LUFS = -70.0
+_REL_GATE_LU = -10.0
+
+
+def _as_2d(samples):
+    return samples.reshape(-1, 1) if samples.ndim == 1 else samples
+
+
+def k_weighting_sos(sr):
+    """
+    ITU-R BS.1770 K-weighting (high-shelf pre-filter + RLB high-pass) as
+    second-order sections, designed for `sr` (exact coefficients at 48 kHz).
+    """
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = np.tan(np.pi * f0 / sr)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = [(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+             1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = np.tan(np.pi * f0 / sr)
+    a0 = 1 + k / q + k * k
+    highpass = [1.0, -2.0, 1.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+    return np.array([shelf, highpass])
+
+
+class LoudnessMeter:
+    """
+    Incremental BS.1770 integrated loudness meter.
+
+    K-weighted power is accumulated in 100 ms sub-blocks; gating blocks are
+    400 ms windows with 75% overlap, built from four consecutive sub-blocks.
+    All channels are weighted 1.0 (mono/stereo content).
+    """
+
+    def __init__(self, sr, channels):
+        self.sos = k_weighting_sos(sr)
+        self.zi = np.zeros((self.sos.shape[0], 2, channels))
+        self.step = int(round(0.1 * sr))
+        self._pending = np.zeros((0, channels))
+        self._powers = []
+
+    def add(self, block):
+        weighted, self.zi = signal.sosfilt(self.sos, _as_2d(block), axis=0, zi=self.zi)
+        weighted = np.concatenate([self._pending, weighted])
+        n = len(weighted) // self.step
+        if n:
+            head = weighted[:n * self.step].reshape(n, self.step, -1)
+            self._powers.extend(np.mean(head ** 2, axis=1).sum(axis=1))
+        self._pending = weighted[n * self.step:]
+
+    def integrated(self):
+        """Gated integrated loudness in LUFS (-inf if nothing passes the absolute gate)."""
+        powers = np.asarray(self._powers)
+        if len(powers) < 4:
+            return float("-inf")
+        blocks = (powers[:-3] + powers[1:-2] + powers[2:-1] + powers[3:]) / 4
+        loudness = -0.691 + 10 * np.log10(blocks + 1e-20)
+
+        above_abs = loudness > _ABS_GATE_LUFS
+        if not above_abs.any():
+            return float("-inf")
+        relative_gate = -0.691 + 10 * np.log10(blocks[above_abs].mean()) + _REL_GATE_LU
+        gated = blocks[above_abs & (loudness > relative_gate)]
+        return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def integrated_loudness(samples, sr):
+    """BS.1770 integrated loudness of a float32 buffer, in LUFS."""
+    meter = LoudnessMeter(sr, _as_2d(samples).shape[1])
+    meter.add(samples)
+    return meter.integrated()
+
+
+class Compressor:
+    """
+    Feed-forward RMS compressor (hard knee, no makeup gain).
+
+    The mean-square level is tracked per 1 ms control hop with separate
+    attack and release coefficients; the resulting gain is ramped linearly
+    across each hop. State carries across calls, so a signal can be fed
+    block by block.
+    """
+
+    def __init__(self, sr, threshold_db=-30.0, ratio=6.0, attack_ms=10.0, release_ms=1000.0, hop_ms=1.0):
+        self.threshold_db = threshold_db
+        self.ratio = ratio
+        self.hop = max(1, int(round(sr * hop_ms / 1000)))
+        self._attack = np.exp(-1.0 / (sr * attack_ms / 1000))
+        self._release = np.exp(-1.0 / (sr * release_ms / 1000))
+        self._env = 0.0
+        self._gain = 1.0
+
+    def process(self, block):
+        x = _as_2d(block)
+        n = len(x)
+        if n == 0:
+            return block.copy()
+
+        starts = np.arange(0, n, self.hop)
+        lengths = np.diff(np.append(starts, n))
+        power = np.add.reduceat(np.mean(x.astype(np.float64) ** 2, axis=1), starts) / lengths
+
+        # The only sequential part: one envelope update per control hop
+        attack = (self._attack ** lengths).tolist()
+        release = (self._release ** lengths).tolist()
+        env = self._env
+        envelope = np.empty(len(starts))
+        for i, p in enumerate(power.tolist()):
+            coeff = attack[i] if p > env else release[i]
+            env = p + (env - p) * coeff
+            envelope[i] = env
+        self._env = env
+
+        level_db = 10 * np.log10(envelope + 1e-20)
+        over = np.maximum(level_db - self.threshold_db, 0.0)
+        hop_gain = 10 ** (-over * (1 - 1 / self.ratio) / 20)
+
+        gain_start = np.repeat(np.concatenate(([self._gain], hop_gain[:-1])), lengths)
+        gain_end = np.repeat(hop_gain, lengths)
+        frac = (np.arange(n) - np.repeat(starts, lengths) + 1) / np.repeat(lengths, lengths)
+        gain = gain_start + (gain_end - gain_start) * frac
+        self._gain = float(hop_gain[-1])
+
+        out = (x * gain[:, None]).astype(np.float32)
+        return out.reshape(block.shape)
+
+
+class TruePeakLimiter:
+    """
+    Look-ahead limiter that keeps 4x-oversampled (true) peaks under `ceiling_db`.
+
+    The gain needed per sample is min-filtered over the look-ahead window and
+    then averaged, which ramps the gain down before each peak and back up
+    after it. Output is delayed by the look-ahead; call flush() at the end.
+    """
+
+    OVERSAMPLE = 4
+    _FILTER_CONTEXT = 64  # samples of context around each block for the polyphase resampler
+
+    def __init__(self, sr, ceiling_db=TRUE_PEAK_DB, lookahead_ms=5.0):
+        self.ceiling = 10 ** (ceiling_db / 20)
+        self.lookahead = max(1, int(round(sr * lookahead_ms / 1000)))
+        # Samples needed on each side of an output sample to compute its gain exactly
+        self._reach = self.lookahead + self.lookahead // 2 + self._FILTER_CONTEXT
+        self._buffer = None
+        self._history = 0
+
+    def _gain(self, x):
+        over = signal.resample_poly(x, self.OVERSAMPLE, 1, axis=0)
+        over = np.abs(over[:len(x) * self.OVERSAMPLE]).reshape(len(x), self.OVERSAMPLE, -1)
+        peak = np.maximum(over.max(axis=(1, 2)), np.abs(x).max(axis=1))
+        needed = np.minimum(1.0, self.ceiling / np.maximum(peak, 1e-12))
+        held = minimum_filter1d(needed, size=2 * self.lookahead + 1, mode="nearest")
+        return np.minimum(uniform_filter1d(held, size=self.lookahead + 1, mode="nearest"), needed)
+
+    def process(self, block):
+        x = _as_2d(block).astype(np.float32)
+        if self._buffer is None:
+            self._buffer = np.zeros((0, x.shape[1]), dtype=np.float32)
+        x = np.concatenate([self._buffer, x])
+
+        ready = len(x) - self._reach
+        if ready <= self._history:
+            self._buffer = x
+            return x[:0]
+
+        gain = self._gain(x)
+        out = x[self._history:ready] * gain[self._history:ready, None]
+        keep_from = max(0, ready - self._reach)
+        self._buffer = x[keep_from:]
+        self._history = ready - keep_from
+        return out
+
+    def flush(self):
+        if self._buffer is None or len(self._buffer) <= self._history:
+            return np.zeros((0, 1 if self._buffer is None else self._buffer.shape[1]), dtype=np.float32)
+        tail = len(self._buffer) - self._history
+        x = np.concatenate([self._buffer, np.zeros((self._reach, self._buffer.shape[1]), dtype=np.float32)])
+        gain = self._gain(x)
+        out = x[self._history:self._history + tail] * gain[self._history:self._history + tail, None]
+        self._buffer = None
+        self._history = 0
+        return out
+
+
+def _blocks(samples, sr, block_sec=BLOCK_SEC):
+    step = max(1, int(sr * block_sec))
+    for start in range(0, len(samples), step):
+        yield samples[start:start + step]
+
+
+def iter_normalized(blocks, sr, channels, target_lufs=TARGET_LUFS, true_peak_db=TRUE_PEAK_DB,
+                    compressor=None, apply_normalization=True):
+    """
+    Streaming mode: compresses, normalizes and limits blocks as they arrive.
+
+    The normalization gain follows the running integrated loudness of
+    everything seen so far and is ramped across each block, so memory stays
+    bounded by one block. Use the two-pass mode when exact integrated
+    loudness matters more than memory.
+    """
+    comp = Compressor(sr, **(compressor or COMPRESSOR_SETTINGS))
+    if not apply_normalization:
+        for block in blocks:
+            yield _as_2d(comp.process(block))
+        return
+
+    meter = LoudnessMeter(sr, channels)
+    limiter = TruePeakLimiter(sr, true_peak_db)
+    gain_db = None
+    for block in blocks:
+        compressed = _as_2d(comp.process(block))
+        meter.add(compressed)
+        loudness = meter.integrated()
+        new_gain_db = gain_db if not np.isfinite(loudness) else target_lufs - loudness
+        if new_gain_db is None:
+            new_gain_db = 0.0
+        ramp = np.linspace(gain_db if gain_db is not None else new_gain_db, new_gain_db, len(compressed))
+        gain_db = new_gain_db
+        out = limiter.process(compressed * (10 ** (ramp / 20))[:, None].astype(np.float32))
+        if len(out):
+            yield out
+    tail = limiter.flush()
+    if len(tail):
+        yield tail
+
+
+def normalize_two_pass(samples, sr, target_lufs=TARGET_LUFS, true_peak_db=TRUE_PEAK_DB,
+                       compressor=None, apply_normalization=True):
+    """
+    Two-pass (exact) mode: compress, measure the integrated loudness of the
+    compressed signal, apply one static gain to hit `target_lufs`, then
+    true-peak limit. Returns a float32 buffer shaped like `samples`.
+    """
+    if not len(samples):
+        return samples.astype(np.float32)
+
+    comp = Compressor(sr, **(compressor or COMPRESSOR_SETTINGS))
+    compressed = np.concatenate([_as_2d(comp.process(b)) for b in _blocks(samples, sr)])
+    if not apply_normalization:
+        return compressed.reshape(samples.shape)
+
+    loudness = integrated_loudness(compressed, sr)
+    gain = 10 ** ((target_lufs - loudness) / 20) if np.isfinite(loudness) else 1.0
+    print(f"📏 Integrated loudness after compression: {loudness:.1f} LUFS, gain {20 * np.log10(gain):+.1f} dB")
+
+    limiter = TruePeakLimiter(sr, true_peak_db)
+    pieces = [limiter.process(b * np.float32(gain)) for b in _blocks(compressed, sr)]
+    pieces.append(limiter.flush())
+    return np.concatenate(pieces).reshape(samples.shape)
+
+
+def write_normalized(samples, sr, output_path, mode=None, apply_normalization=True, subtype="PCM_16"):
+    """
+    Runs the compressor / loudness / limiter chain and writes the result in a single encode.
+
+    Args:
+        mode (str): "two_pass" (exact, default) or "streaming" (bounded memory).
+    """
+    mode = mode or NORMALIZE_MODE
+    if mode == "two_pass":
+        sf.write(output_path, normalize_two_pass(samples, sr, apply_normalization=apply_normalization),
+                 sr, subtype=subtype)
+    elif mode == "streaming":
+        channels = _as_2d(samples).shape[1]
+        with sf.SoundFile(output_path, "w", samplerate=sr, channels=channels, subtype=subtype) as out:
+            for block in iter_normalized(_blocks(samples, sr), sr, channels,
+                                         apply_normalization=apply_normalization):
+                out.write(block)
+    else:
+        raise ValueError(f"Unknown normalization mode: {mode}")
+    return output_path
@@ -9,11 +9,12 @@ from pydub import AudioSegment  # type: ignore
 from dotenv import load_dotenv
 
 import cloudinary  # type: ignore
-import cloudinary.uploader  # type: ignore
 
-from utils import mp3_to_wav
+from utils import mp3_to_wav, stage_timer
 from audio_fn import denoise_audio, normalize_audio, disfluency_removal
-from generate_metadata import generate_metadata  # <- your function from earlier
+from artifacts import RunArtifacts
+from delivery import start_delivery
+from generate_metadata import generate_platform_metadata
 
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
@@ -28,22 +29,30 @@ cloudinary.config(
 )
 
 
-def process_audio(input_audio_path, run_uuid):
+def process_audio(input_audio_path, run_uuid, timings=None):
+    """
+    Runs the full pipeline on one file.
+
+    If `timings` is a dict, the wall time of each stage (seconds) is recorded in it.
+    """
     base_name = os.path.splitext(os.path.basename(input_audio_path))[0]
     output_dir = "output"
     os.makedirs(output_dir, exist_ok=True)
-    final_output_path = os.path.join(output_dir, f"{base_name}_final.wav")
+    artifacts = RunArtifacts(run_uuid)
+    final_output_path = artifacts.file(f"{base_name}_final.wav")
 
     # Step 0: Convert to WAV if needed
-    if not input_audio_path.lower().endswith(".wav"):
-        print(f"🎵 Converting '{input_audio_path}' to WAV format...")
-        wav_path = mp3_to_wav(input_audio_path)
-    else:
-        wav_path = input_audio_path
+    with stage_timer(timings, "convert"):
+        if not input_audio_path.lower().endswith(".wav"):
+            print(f"🎵 Converting '{input_audio_path}' to WAV format...")
+            wav_path = mp3_to_wav(input_audio_path)
+        else:
+            wav_path = input_audio_path
 
     # Step 1: Denoising
     print("\n=== Step 1: Denoising ===")
-    denoised_audio, sr = denoise_audio(wav_path)
+    with stage_timer(timings, "denoise"):
+        denoised_audio, sr = denoise_audio(wav_path)
 
     with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_wav_file:
         if denoised_audio.dim() == 1:
@@ -56,50 +65,37 @@ def process_audio(input_audio_path, run_uuid):
     # Step 2: Disfluency Removal
     denoised_audio_segment = AudioSegment.from_wav(denoised_wav_path)
     print("\n=== Step 2: Disfluency Removal ===")
-    cleaned_audio = disfluency_removal(denoised_audio_segment, sr)
+    with stage_timer(timings, "disfluency"):
+        cleaned_audio, transcript = disfluency_removal(denoised_audio_segment, sr, artifacts)
 
     # Step 3: Normalization
     print("\n=== Step 3: Normalization ===")
-    normalize_audio(cleaned_audio, final_output_path)
+    with stage_timer(timings, "normalize"):
+        normalize_audio(cleaned_audio, final_output_path)
 
     print(f"\n🎉 Done! Final processed audio saved at: {final_output_path}")
 
-    # Step 4: Upload to Cloudinary
-    print("\n☁️ Uploading to Cloudinary...")
-    upload_result = cloudinary.uploader.upload_large(
-        final_output_path,
-        resource_type="video",  # audio = video for Cloudinary
-        folder="enhanced_audio"
-    )
-    cloud_url = upload_result["secure_url"]
+    # Step 4: Encode and upload to Cloudinary in the background
+    print("\n☁️ Uploading to Cloudinary in the background...")
+    delivery = start_delivery(final_output_path, destination="cloudinary", folder="enhanced_audio")
     cloudinary_uuid = str(uuid.uuid4())
 
-    # Step 5: Load transcript UUID from metadata
-    meta_path = None
-    for fname in os.listdir(output_dir):
-        if fname.endswith("_meta.json"):
-            meta_path = os.path.join(output_dir, fname)
-            break
-
-    if not meta_path:
-        print("❌ No metadata file found.")
-        return
-
-    with open(meta_path, "r", encoding="utf-8") as f:
-        meta = json.load(f)
-    transcript_uuid = meta.get("transcript_uuid")
-
-    if not transcript_uuid:
-        print("❌ transcript_uuid missing in meta file.")
-        return
+    # Step 5: Transcript comes straight from the disfluency stage
+    transcript_uuid = transcript.transcript_uuid
+    transcript_text = transcript.text
 
-    transcript_path = os.path.join(output_dir, f"{transcript_uuid}.txt")
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        transcript_text = f.read()
+    # Step 6: Generate Podcast Metadata (every platform in one request), overlapping the upload
+    with stage_timer(timings, "metadata"):
+        podcast_meta = generate_platform_metadata(transcript_text, ["Apple Podcasts", "Spotify"],
+                                                  transcript.word_index)
+    apple_meta = podcast_meta["Apple Podcasts"]
+    spotify_meta = podcast_meta["Spotify"]
 
-    # Step 6: Generate Podcast Metadata
-    apple_meta = generate_metadata(transcript_text, platform="Apple Podcasts")
-    spotify_meta = generate_metadata(transcript_text, platform="Spotify")
+    # Only the part of the upload that metadata generation did not hide is timed here
+    with stage_timer(timings, "upload_wait"):
+        delivered = delivery.result()
+    cloud_url = delivered["url"]
+    artifacts.record("delivery_audio", delivered["path"])
 
     # Step 7: Save full result JSON
     result = {
@@ -117,6 +113,8 @@ def process_audio(input_audio_path, run_uuid):
     json_output_path = os.path.join(output_dir, f"{run_uuid}_final_output.json")
     with open(json_output_path, "w", encoding="utf-8") as f:
         json.dump(result, f, indent=2)
+    artifacts.record("final_audio", final_output_path)
+    artifacts.record("final_output", json_output_path)
 
     print(f"\n All done! Output saved to: {json_output_path}")
     return result
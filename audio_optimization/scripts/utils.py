@@ -1,7 +1,12 @@
 import os
 import json
+import time
+import numpy as np
+from contextlib import contextmanager
 from pydub import AudioSegment # type: ignore
 
+from word_index import WordIndex
+
 def generate_transcription_and_timestamps(model, audio_path):
     """
     Transcribe audio using Whisper with word timestamps.
@@ -22,6 +27,16 @@ def generate_transcription_and_timestamps(model, audio_path):
 
     return full_text, words
 
+@contextmanager
+def stage_timer(timings, name):
+    """Records the wall time of the enclosed block as timings[name] (seconds); no-op if timings is None."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = round(time.perf_counter() - start, 3)
+
 def save_transcript_text(text, path):
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
@@ -29,51 +44,126 @@ def save_transcript_text(text, path):
     print(f"📝 Transcription saved to: {path}")
 
 def save_word_timestamps(words, path):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(words, f, indent=2)
-    print(f"🕒 Word timestamps saved to: {path}")
-
-def remove_non_word_regions(audio_path, words, filler_words, buffer_sec=0.05, fade_ms=20):
+    """Writes word timestamps as a columnar WordIndex file and returns the index."""
+    index = words if isinstance(words, WordIndex) else WordIndex.from_words(words)
+    index.save(path)
+    print(f"🕒 Word timestamps saved to: {path} ({len(index)} words, {len(index.vocab)} distinct)")
+    return index
+
+
+def load_word_timestamps(path, mmap=True):
+    """Opens a WordIndex written by save_word_timestamps (memory-mapped by default)."""
+    return WordIndex.load(path, mmap=mmap)
+
+def merge_intervals(intervals, gap_threshold=0.1):
+    """Merge (start, end) intervals that overlap or are closer than gap_threshold seconds."""
+    if not intervals:
+        return []
+    intervals = sorted(intervals)
+    merged = [intervals[0]]
+    for current in intervals[1:]:
+        last = merged[-1]
+        if current[0] <= last[1] + gap_threshold:
+            merged[-1] = (last[0], max(last[1], current[1]))
+        else:
+            merged.append(current)
+    return merged
+
+
+def splice_intervals(samples, sr, intervals, fade_ms=20):
+    """
+    Concatenate the given (start, end) second intervals of a float32 buffer,
+    with a fade in/out of `fade_ms` on every piece.
+
+    Produces the same samples as slicing an AudioSegment with
+    `audio[start * 1000: end * 1000].fade_in(fade_ms).fade_out(fade_ms)` and
+    summing the pieces (pydub's whole-millisecond piece lengths and its
+    -120 dB -> 0 dB per-sample linear ramp included). It does this in
+    O(total samples): the output is preallocated and filled by slicing.
+
+    Pieces shorter than the fade (e.g. slivers left by SpeechMap.clip) are
+    dropped: they would be inaudible once faded, and pydub's fades mangle
+    their length rather than producing a defined result.
+    """
+    if not intervals:
+        return samples[:0].copy()
+
+    k = sr / 1000.0
+    n = len(samples)
+    total_ms = round(1000 * (n / sr))
+
+    bounds_ms = np.minimum(np.asarray(intervals, dtype=np.float64) * 1000, total_ms)
+    src_start = (bounds_ms[:, 0] * k).astype(np.int64)
+    seg_len = np.maximum((bounds_ms[:, 1] * k).astype(np.int64) - src_start, 0)
+
+    # pydub re-slices each faded piece on whole-millisecond boundaries
+    seg_ms = np.round(1000 * (seg_len / sr))
+    body_len = (seg_ms * k).astype(np.int64)
+    body_ms = np.round(1000 * (body_len / sr))
+
+    audible = body_ms >= fade_ms
+    src_start, seg_len, body_len, body_ms = (a[audible] for a in (src_start, seg_len, body_len, body_ms))
+    fade_out_start = np.maximum(((body_ms - fade_ms) * k).astype(np.int64), 0)
+    n_fade_out = (body_ms * k - (body_ms - fade_ms) * k).astype(np.int64)
+
+    fade_frames = fade_ms * k
+    n_fade = int(fade_frames)
+    floor_gain = 10 ** (-120 / 20)
+    step = (1.0 - floor_gain) / fade_frames
+    ramp_in = (floor_gain + step * np.arange(n_fade)).astype(np.float32)
+    ramp_out = (1.0 - step * np.arange(n_fade + 1)).astype(np.float32)
+    if samples.ndim > 1:
+        ramp_in = ramp_in[:, None]
+        ramp_out = ramp_out[:, None]
+
+    out_len = fade_out_start + np.minimum(n_fade_out, body_len - fade_out_start)
+    offsets = np.concatenate(([0], np.cumsum(out_len)))
+    output = np.zeros((int(offsets[-1]),) + samples.shape[1:], dtype=np.float32)
+
+    for i in range(len(src_start)):
+        piece = output[offsets[i]:offsets[i + 1]]
+        copy_len = min(int(seg_len[i]), len(piece), n - int(src_start[i]))
+        piece[:copy_len] = samples[src_start[i]:src_start[i] + copy_len]
+
+        fade_in_len = min(n_fade, len(piece))
+        piece[:fade_in_len] *= ramp_in[:fade_in_len]
+        fade_out_len = len(piece) - int(fade_out_start[i])
+        piece[int(fade_out_start[i]):] *= ramp_out[:fade_out_len]
+
+    return output
+
+
+def remove_non_word_regions(audio_path, words, filler_words, buffer_sec=0.05, fade_ms=20, speech_map=None):
     """
     Keep only audio segments corresponding to non-filler words.
+    `words` is a list of {word, start, end} dicts or a WordIndex.
     Remove all other parts of the audio.
+    If a vad.SpeechMap is given, kept segments are also trimmed to detected speech,
+    so word buffers never reach into silence or music beds.
     """
     print("\n🔍 Keeping only non-filler word segments...")
     audio = AudioSegment.from_wav(audio_path)
 
-    keep_intervals = []
-    for w in words:
-        word = w["word"].strip().lower()
-        if word not in filler_words:
-            start = max(0, w["start"] - buffer_sec)
-            end = min(audio.duration_seconds, w["end"] + buffer_sec)
-            keep_intervals.append((start, end))
-
-    # Merge close intervals
-    def merge_intervals(intervals, gap_threshold=0.1):
-        if not intervals:
-            return []
-        intervals.sort()
-        merged = [intervals[0]]
-        for current in intervals[1:]:
-            last = merged[-1]
-            if current[0] <= last[1] + gap_threshold:
-                merged[-1] = (last[0], max(last[1], current[1]))
-            else:
-                merged.append(current)
-        return merged
+    # Filler lookup runs on the vocabulary, then one vectorized pass over the columns
+    index = words if isinstance(words, WordIndex) else WordIndex.from_words(words)
+    keep = ~index.match(filler_words)
+    starts = np.maximum(0, index.starts[keep].astype(np.float64) - buffer_sec)
+    ends = np.minimum(audio.duration_seconds, index.ends[keep].astype(np.float64) + buffer_sec)
+    keep_intervals = list(zip(starts.tolist(), ends.tolist()))
 
     merged_intervals = merge_intervals(keep_intervals)
-
-    # Build clean audio
-    clean_audio = AudioSegment.empty()
-    for start, end in merged_intervals:
-        segment = audio[start * 1000: end * 1000]
-        segment = segment.fade_in(fade_ms).fade_out(fade_ms)
-        clean_audio += segment
-
-    return clean_audio
+    if speech_map is not None:
+        merged_intervals = speech_map.clip(merged_intervals)
+
+    # Build clean audio with the numpy splice engine, then hand back an AudioSegment
+    samples = np.asarray(audio.get_array_of_samples(), dtype=np.float32)
+    if audio.channels > 1:
+        samples = samples.reshape(-1, audio.channels)
+    spliced = splice_intervals(samples, audio.frame_rate, merged_intervals, fade_ms)
+    # Round and clip to the sample type: a plain cast truncates toward zero and wraps on overshoot
+    info = np.iinfo(audio.array_type)
+    pcm = np.clip(np.rint(spliced), info.min, info.max).astype(audio.array_type)
+    return audio._spawn(pcm.tobytes())
 
 
 def mp3_to_wav(mp3_path, wav_path=None):
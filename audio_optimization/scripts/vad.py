@@ -0,0 +1,158 @@
+import numpy as np
+
+FRAME_MS = 30
+THRESHOLD_DB = 12.0       # speech must sit this far above the estimated noise floor
+ABS_FLOOR_DB = -55.0      # frames quieter than this are never speech
+MIN_SPEECH_MS = 200
+MIN_SILENCE_MS = 400
+PAD_MS = 200
+
+
+class SpeechMap:
+    """
+    Speech regions of a recording and the mapping between the original
+    timeline and the "compacted" timeline in which only speech is kept.
+
+    Regions are sorted, non-overlapping (start, end) pairs in seconds of the
+    original recording. Compacting concatenates them back to back, so a time
+    `t` in the compacted audio maps to `regions[i][0] + (t - offsets[i])`.
+    """
+
+    def __init__(self, regions, duration):
+        self.regions = [(float(s), float(e)) for s, e in regions]
+        self.duration = float(duration)
+        lengths = np.array([e - s for s, e in self.regions], dtype=np.float64)
+        self.offsets = np.concatenate(([0.0], np.cumsum(lengths)))
+        self._starts = np.array([s for s, _ in self.regions], dtype=np.float64)
+
+    @property
+    def speech_duration(self):
+        return float(self.offsets[-1])
+
+    def compact(self, samples, sr):
+        """Concatenates the speech regions of `samples` into one buffer."""
+        if not self.regions:
+            return samples[:0].copy()
+        pieces = [samples[int(round(s * sr)):int(round(e * sr))] for s, e in self.regions]
+        return np.concatenate(pieces)
+
+    def to_original(self, t, is_end=False):
+        """
+        Maps a compacted-timeline time to the original timeline.
+
+        A time that falls exactly on the seam between two regions belongs to
+        the earlier region when it is an end time and to the later one otherwise.
+        """
+        if not self.regions:
+            return float(t)
+        i = self._region_index(t, is_end)
+        return float(self._starts[i] + (t - self.offsets[i]))
+
+    def _region_index(self, t, is_end=False):
+        """Index of the region a compacted-timeline time falls in (see to_original)."""
+        side = "left" if is_end else "right"
+        i = int(np.searchsorted(self.offsets[1:], t, side=side))
+        return min(i, len(self.regions) - 1)
+
+    def remap_words(self, words):
+        """
+        Returns copies of Whisper word dicts with start/end moved to the original timeline.
+
+        A word is kept inside the speech region its start falls in: if Whisper
+        stretched it across a seam, its end is clamped to that region's end
+        instead of spanning the removed silence.
+        """
+        remapped = []
+        for w in words:
+            mapped = dict(w)
+            start = self.to_original(w["start"])
+            end = self.to_original(w["end"], is_end=True)
+            if self.regions:
+                region_end = self.regions[self._region_index(w["start"])][1]
+                end = max(start, min(end, region_end))
+            mapped["start"] = round(start, 2)
+            mapped["end"] = round(end, 2)
+            remapped.append(mapped)
+        return remapped
+
+    def clip(self, intervals):
+        """Intersects (start, end) intervals on the original timeline with the speech regions."""
+        clipped = []
+        for start, end in intervals:
+            for s, e in self.regions:
+                if e <= start:
+                    continue
+                if s >= end:
+                    break
+                clipped.append((max(start, s), min(end, e)))
+        return clipped
+
+    def to_dict(self):
+        return {"duration": self.duration, "regions": self.regions}
+
+
+def _runs(mask):
+    """Returns (start, end) frame index pairs of the True runs in a boolean array."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges.reshape(-1, 2)
+
+
+def detect_speech(samples, sr, frame_ms=FRAME_MS, threshold_db=THRESHOLD_DB,
+                  abs_floor_db=ABS_FLOOR_DB, min_speech_ms=MIN_SPEECH_MS,
+                  min_silence_ms=MIN_SILENCE_MS, pad_ms=PAD_MS):
+    """
+    Energy-based voice activity detection.
+
+    Frame energies are compared against an adaptive threshold derived from the
+    recording's own noise floor. Short pauses inside speech are bridged, short
+    bursts are dropped, and every region is padded so word edges survive.
+
+    Args:
+        samples (np.ndarray): float32 samples, (frames,) or (frames, channels).
+        sr (int): Sample rate.
+
+    Returns:
+        SpeechMap: Detected regions. If nothing qualifies as speech, the whole
+            recording is returned as one region so transcription still runs.
+    """
+    mono = samples if samples.ndim == 1 else samples.mean(axis=1)
+    duration = len(mono) / sr
+    frame_len = max(1, int(sr * frame_ms / 1000))
+    n_frames = len(mono) // frame_len
+    if n_frames == 0:
+        return SpeechMap([(0.0, duration)] if duration else [], duration)
+
+    frames = mono[:n_frames * frame_len].reshape(n_frames, frame_len).astype(np.float64)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-12)
+
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(noise_floor + threshold_db, abs_floor_db)
+    speech = energy_db > threshold
+
+    # Bridge pauses shorter than min_silence_ms
+    min_silence = int(np.ceil(min_silence_ms / frame_ms))
+    for start, end in _runs(~speech):
+        if start > 0 and end < n_frames and end - start < min_silence:
+            speech[start:end] = True
+
+    # Drop bursts shorter than min_speech_ms
+    min_speech = int(np.ceil(min_speech_ms / frame_ms))
+    for start, end in _runs(speech):
+        if end - start < min_speech:
+            speech[start:end] = False
+
+    pad = pad_ms / 1000
+    frame_sec = frame_len / sr
+    regions = []
+    for start, end in _runs(speech):
+        s = round(max(0.0, start * frame_sec - pad), 3)
+        e = round(min(duration, end * frame_sec + pad), 3)
+        if regions and s <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], e)
+        else:
+            regions.append((s, e))
+
+    if not regions:
+        regions = [(0.0, duration)]
+    return SpeechMap(regions, duration)
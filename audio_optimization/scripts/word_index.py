@@ -0,0 +1,115 @@
+import os
+import json
+import struct
+import threading
+import numpy as np
+
+# On-disk layout (little endian):
+#   magic (8 bytes) | count: uint32 | vocab_bytes: uint32 | vocab: JSON list, padded to 4 bytes
+#   | ids: uint32[count] | starts: float32[count] | ends: float32[count]
+MAGIC = b"WORDIDX1"
+_HEADER = struct.Struct("<8sII")
+
+
+class WordIndex:
+    """
+    Columnar word-timestamp transcript.
+
+    Tokens are interned into a vocabulary and stored as uint32 ids next to
+    float32 start/end columns, so an hour-long transcript is a few hundred KB
+    that loads with mmap instead of megabytes of JSON parsed per consumer.
+    Entries are kept in time order; time-range queries bisect the start column.
+    """
+
+    def __init__(self, vocab, ids, starts, ends):
+        self.vocab = list(vocab)
+        self.ids = ids
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_words(cls, words, key="word"):
+        """Builds an index from [{key, "start", "end"}] dicts (Whisper words or segments)."""
+        words = sorted(words, key=lambda w: w["start"])
+        lookup = {}
+        ids = np.fromiter(
+            (lookup.setdefault(w[key].strip(), len(lookup)) for w in words),
+            dtype=np.uint32, count=len(words)
+        )
+        starts = np.fromiter((w["start"] for w in words), dtype=np.float32, count=len(words))
+        ends = np.fromiter((w["end"] for w in words), dtype=np.float32, count=len(words))
+        return cls(lookup, ids, starts, ends)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(path, "rb") as f:
+            magic, count, vocab_bytes = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a word index file: {path}")
+            vocab = json.loads(f.read(vocab_bytes).decode("utf-8"))
+
+        offset = _HEADER.size + vocab_bytes + (-vocab_bytes % 4)
+        if mmap and count:
+            columns = [
+                np.memmap(path, dtype=dtype, mode="r", offset=offset + i * 4 * count, shape=(count,))
+                for i, dtype in enumerate(("<u4", "<f4", "<f4"))
+            ]
+        else:
+            raw = np.fromfile(path, dtype=np.uint8, offset=offset, count=12 * count)
+            columns = [raw[i * 4 * count:(i + 1) * 4 * count].view(dtype)
+                       for i, dtype in enumerate(("<u4", "<f4", "<f4"))]
+        return cls(vocab, *columns)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        vocab = json.dumps(self.vocab, ensure_ascii=False).encode("utf-8")
+        # Unique per writer: concurrent builders of the same index must not share a temp file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(self), len(vocab)))
+            f.write(vocab + b" " * (-len(vocab) % 4))
+            for column, dtype in ((self.ids, "<u4"), (self.starts, "<f4"), (self.ends, "<f4")):
+                f.write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+        os.replace(tmp_path, path)
+        return path
+
+    def __len__(self):
+        return len(self.ids)
+
+    def token(self, i):
+        return self.vocab[self.ids[i]]
+
+    def span(self, start, end):
+        """Slice of the entries whose start time falls in [start, end]."""
+        lo = int(np.searchsorted(self.starts, start, side="left"))
+        hi = int(np.searchsorted(self.starts, end, side="right"))
+        return slice(lo, hi)
+
+    def entries(self, start=None, end=None, key="word"):
+        """Entries as [{key, "start", "end"}] dicts, optionally limited to a time range."""
+        window = self.span(start, end) if start is not None else slice(0, len(self))
+        return [
+            {key: self.vocab[i], "start": round(float(s), 2), "end": round(float(e), 2)}
+            for i, s, e in zip(self.ids[window].tolist(), self.starts[window], self.ends[window])
+        ]
+
+    def text(self, start=None, end=None):
+        window = self.span(start, end) if start is not None else slice(0, len(self))
+        return " ".join(self.vocab[i] for i in self.ids[window].tolist())
+
+    def match(self, tokens):
+        """Boolean mask of the entries whose token (stripped, lowercased) is in `tokens`."""
+        wanted = {t.lower() for t in tokens}
+        vocab_ids = [i for i, t in enumerate(self.vocab) if t.lower() in wanted]
+        return np.isin(self.ids, np.asarray(vocab_ids, dtype=np.uint32))
+
+    def sections(self, seconds):
+        """Splits the transcript into consecutive (start_time, text) sections of about `seconds` each."""
+        if not len(self):
+            return []
+        edges = np.arange(0.0, float(self.starts[-1]) + seconds, seconds)
+        bounds = np.searchsorted(self.starts, edges, side="left").tolist() + [len(self)]
+        return [
+            (float(edges[k]), " ".join(self.vocab[i] for i in self.ids[lo:hi].tolist()))
+            for k, (lo, hi) in enumerate(zip(bounds, bounds[1:])) if hi > lo
+        ]
@@ -0,0 +1,128 @@
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+import traceback
+import socketserver
+from contextlib import redirect_stdout
+
+from audio_fn import load_models
+from main import process_audio
+
+# Protocol: one JSON object per line in, one JSON object per line out.
+#   {"id": "job-1", "input_path": "data/episode.mp3"}          -> run the pipeline
+#   {"id": "job-2", "cmd": "ping"}                             -> health check
+#   {"cmd": "shutdown"}                                        -> stop the worker
+# Responses echo "id" and carry "ok", "result" or "error", and per-stage "timings".
+# Pipeline logs go to stderr so stdout only ever carries protocol lines.
+
+
+def handle_request(request):
+    """
+    Executes one protocol request against the resident models.
+
+    Returns:
+        dict: The response object, or None for a shutdown request.
+    """
+    cmd = request.get("cmd", "process")
+    response = {"id": request.get("id")}
+
+    if cmd == "shutdown":
+        return None
+    if cmd == "ping":
+        response.update(ok=True, result="pong")
+        return response
+    if cmd != "process":
+        response.update(ok=False, error=f"Unknown cmd: {cmd}")
+        return response
+
+    input_path = request.get("input_path")
+    if not input_path:
+        response.update(ok=False, error="Missing input_path")
+        return response
+
+    timings = {}
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(sys.stderr):
+            result = process_audio(input_path, request.get("run_uuid") or str(uuid.uuid4()), timings)
+        response.update(ok=result is not None, result=result)
+        if result is None:
+            response["error"] = "Pipeline finished without a result"
+    except Exception as e:
+        traceback.print_exc(file=sys.stderr)
+        response.update(ok=False, error=str(e))
+
+    timings["total"] = round(time.perf_counter() - start, 3)
+    response["timings"] = timings
+    return response
+
+
+def serve_stdin():
+    """Reads requests from stdin and writes responses to stdout until EOF or shutdown."""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            response = {"id": None, "ok": False, "error": f"Invalid JSON: {e}"}
+        else:
+            response = handle_request(request)
+            if response is None:
+                break
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            line = raw.decode("utf-8").strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                response = {"id": None, "ok": False, "error": f"Invalid JSON: {e}"}
+            else:
+                response = handle_request(request)
+                if response is None:
+                    # shutdown() blocks until serve_forever exits, so it must run off this thread
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    return
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def serve_socket(host, port):
+    """
+    Serves the same line protocol over TCP. Connections are handled one at a
+    time, so jobs never compete for the models.
+    """
+    socketserver.TCPServer.allow_reuse_address = True
+    with socketserver.TCPServer((host, port), _JobHandler) as server:
+        print(f"🎧 Audio worker listening on {host}:{port}", file=sys.stderr)
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-lived audio worker with resident DeepFilterNet and Whisper models.")
+    parser.add_argument("--port", type=int, help="Serve over TCP on this port instead of stdin/stdout")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind when --port is given")
+    args = parser.parse_args()
+
+    print("⏳ Loading models...", file=sys.stderr)
+    load_timings = load_models()
+    print(f"✅ Models ready: {load_timings}", file=sys.stderr)
+
+    if args.port:
+        serve_socket(args.host, args.port)
+    else:
+        # Announce readiness on the protocol channel so the caller knows it can send jobs
+        sys.stdout.write(json.dumps({"event": "ready", "timings": load_timings}) + "\n")
+        sys.stdout.flush()
+        serve_stdin()